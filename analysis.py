@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Game Analysis
+Annotates archived games with the engine's view of every ply.
+
+Games are streamed from a game record file in batches.  The positions of a
+batch are deduplicated by canonical position key, against each other and
+against everything analyzed recently, and only the new ones are sent to a
+process pool.  Each worker scores every playable column of a position with
+the exact solver once few enough cells are empty, and with a fixed-depth
+alpha-beta search before that, like the hard AI.
+
+Every game becomes one JSON line listing, for each ply, the best column,
+its score, the played column's score and whether the move was a blunder:
+a move that turns a win into a draw or loss, or a draw into a loss.
+After each batch the output is flushed and a checkpoint records how far
+the run got, so an interrupted run resumes where it stopped.
+
+Usage:
+    python analysis.py games.c4r annotated.jsonl --depth 6 --workers 4
+    python analysis.py games.c4r annotated.jsonl --depth 6 --workers 4 --resume
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from bitboard import Position
+from game_records import read_geometry, read_records
+from search import AlphaBetaSearch, WIN_SCORE
+from solver import Solver
+
+ENGINES = ('hard', 'solver')
+
+# Column scores of a position in canonical orientation (None for full
+# columns), and which engine produced them
+Analysis = Tuple[Tuple[Optional[int], ...], str]
+
+# Per-process engines; the search table is cleared for every position, the
+# solver's is kept since its scores are exact
+_searcher: Optional[AlphaBetaSearch] = None
+_solver: Optional[Solver] = None
+
+
+def _replay(moves: List[int], rows: int, cols: int) -> Position:
+    """Build a position by playing a move sequence."""
+    position = Position(rows, cols)
+    for col in moves:
+        position.play(col)
+    return position
+
+
+def _search_scores(position: Position, depth: int) -> Dict[int, int]:
+    """Score every playable column with a fixed-depth search of the reply."""
+    global _searcher
+    if _searcher is None:
+        _searcher = AlphaBetaSearch()
+    # Entries left by other positions would change the scores, making them
+    # depend on which worker got the position and where a resume started
+    _searcher.table.clear()
+    size = position.rows * position.cols
+    scores = {}
+    for col in position.playable_columns():
+        if position.is_winning_move(col, position.current_player):
+            scores[col] = WIN_SCORE
+            continue
+        position.play(col)
+        if position.moves == size:
+            scores[col] = 0
+        else:
+            scores[col] = -int(_searcher.search(position, depth - 1)[0])
+        position.undo()
+    return scores
+
+
+def analyze_position(task: Tuple[List[int], int, int, str, int, int]) -> Tuple[int, Analysis]:
+    """Score the columns of one position: (canonical key, (scores, engine))."""
+    global _solver
+    moves, rows, cols, engine, depth, solver_threshold = task
+    position = _replay(moves, rows, cols)
+    key, mirrored = position.canonical_key()
+
+    empty_cells = rows * cols - position.moves
+    if engine == 'solver' or (solver_threshold and empty_cells <= solver_threshold):
+        if _solver is None:
+            _solver = Solver()
+        scores, used = _solver.analyze(position)['scores'], 'solver'
+    else:
+        scores, used = _search_scores(position, depth), 'search'
+
+    canonical: List[Optional[int]] = [None] * cols
+    for col, score in scores.items():
+        canonical[position.mirror_column(col) if mirrored else col] = score
+    return key, (tuple(canonical), used)
+
+
+def outcome(score: int, engine: str) -> int:
+    """Get the outcome a score proves: 1 win, -1 loss, 0 draw or undecided."""
+    if engine == 'solver':
+        return (score > 0) - (score < 0)
+    if score >= WIN_SCORE:
+        return 1
+    return -1 if score <= -WIN_SCORE else 0
+
+
+def annotate_game(number: int, record: Dict[str, Any], analyses: Dict[int, Analysis],
+                  rows: int, cols: int) -> Dict[str, Any]:
+    """Annotate every ply of a game from the analyses of its positions."""
+    position = Position(rows, cols)
+    center = (cols - 1) / 2
+    plies = []
+    for ply, col in enumerate(record['moves']):
+        key, mirrored = position.canonical_key()
+        canonical, engine = analyses[key]
+        scores = {position.mirror_column(c) if mirrored else c: score
+                  for c, score in enumerate(canonical) if score is not None}
+        best = max(scores, key=lambda c: (scores[c], -abs(c - center)))
+        played = scores[col]
+        plies.append({
+            'ply': ply,
+            'player': position.current_player,
+            'column': col,
+            'best': best,
+            'score': scores[best],
+            'played_score': played,
+            'loss': scores[best] - played,
+            'blunder': outcome(played, engine) < outcome(scores[best], engine),
+            'engine': engine,
+        })
+        position.play(col)
+    return {'game': number, 'moves': record['moves'], 'winner': record['winner'],
+            'blunders': [entry['ply'] for entry in plies if entry['blunder']],
+            'plies': plies}
+
+
+def _game_positions(record: Dict[str, Any], rows: int, cols: int) -> Iterator[Tuple[int, List[int]]]:
+    """Yield (canonical key, moves) of the position before every ply of a game."""
+    position = Position(rows, cols)
+    for col in record['moves']:
+        yield position.canonical_key()[0], list(position.history)
+        position.play(col)
+
+
+def checkpoint_path(output_path: str) -> str:
+    """Get the checkpoint file path of an analysis output."""
+    return output_path + '.checkpoint'
+
+
+def _write_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """Replace the checkpoint file atomically."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def analyze_archive(input_path: str, output_path: str, engine: str = 'hard', depth: int = 6,
+                    solver_threshold: int = 20, workers: int = 1, batch_games: int = 64,
+                    cache_size: int = 1000000, resume: bool = False,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Annotate every game of a record file, writing one JSON line per game.
+
+    With ``resume`` the run continues from the output's checkpoint, dropping
+    anything written after it.  Returns the counts of games, positions,
+    positions analyzed and positions answered from the dedup cache.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {ENGINES}")
+    rows, cols = read_geometry(input_path)
+    settings = {'input': os.path.abspath(input_path), 'engine': engine, 'depth': depth,
+                'solver_threshold': solver_threshold}
+    checkpoint = dict(settings, games=0, output_bytes=0)
+    check_path = checkpoint_path(output_path)
+
+    if resume and os.path.exists(check_path):
+        with open(check_path, 'r') as f:
+            saved = json.load(f)
+        if any(saved.get(name) != value for name, value in settings.items()):
+            raise ValueError(f"{check_path} was written for a different input or engine settings")
+        checkpoint = saved
+        written = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+        if written < checkpoint['output_bytes']:
+            raise ValueError(f"{output_path} is shorter than its checkpoint says; "
+                             f"it was replaced or truncated since")
+        output = open(output_path, 'r+b')
+        output.truncate(checkpoint['output_bytes'])  # drop games written after the checkpoint
+        output.seek(checkpoint['output_bytes'])
+    else:
+        if os.path.exists(check_path):
+            os.remove(check_path)  # it describes an earlier run's output
+        output = open(output_path, 'wb')
+
+    stats = {'games': 0, 'positions': 0, 'analyzed': 0, 'cache_hits': 0}
+    analyses: Dict[int, Analysis] = {}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    start = time.perf_counter()
+    try:
+        records = islice(read_records(input_path), checkpoint['games'], None)
+        while True:
+            batch = list(islice(records, batch_games))
+            if not batch:
+                break
+
+            # Positions of the batch not analyzed yet, each once
+            tasks: Dict[int, Tuple[List[int], int, int, str, int, int]] = {}
+            for record in batch:
+                for key, moves in _game_positions(record, rows, cols):
+                    stats['positions'] += 1
+                    if key in analyses or key in tasks:
+                        stats['cache_hits'] += 1
+                    else:
+                        tasks[key] = (moves, rows, cols, engine, depth, solver_threshold)
+            if pool is not None:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                results = pool.map(analyze_position, tasks.values(), chunksize=chunksize)
+            else:
+                results = map(analyze_position, tasks.values())
+            for key, analysis in results:
+                analyses[key] = analysis
+            stats['analyzed'] += len(tasks)
+
+            for offset, record in enumerate(batch):
+                annotated = annotate_game(checkpoint['games'] + offset, record, analyses, rows, cols)
+                output.write((json.dumps(annotated) + '\n').encode())
+            output.flush()
+            os.fsync(output.fileno())
+            checkpoint['games'] += len(batch)
+            checkpoint['output_bytes'] = output.tell()
+            _write_checkpoint(check_path, checkpoint)
+            stats['games'] += len(batch)
+
+            # Forget the oldest analyses once the cache is full
+            for key in list(islice(analyses, max(0, len(analyses) - cache_size))):
+                del analyses[key]
+            if progress is not None:
+                progress(dict(stats, total_games=checkpoint['games'],
+                              time=time.perf_counter() - start))
+    finally:
+        output.close()
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    stats.update(total_games=checkpoint['games'], time=elapsed,
+                 positions_per_second=stats['analyzed'] / elapsed if elapsed else 0.0)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Annotate archived Connect Four games with engine analysis.")
+    parser.add_argument('input', help="game record file")
+    parser.add_argument('output', help="JSON lines file of annotated games")
+    parser.add_argument('--engine', choices=ENGINES, default='hard',
+                        help="hard: search, then the solver near the end; solver: exact everywhere")
+    parser.add_argument('--depth', type=int, default=6, help="search depth of the hard engine")
+    parser.add_argument('--solver-threshold', type=int, default=20,
+                        help="empty cells at which the hard engine switches to the solver")
+    parser.add_argument('--workers', type=int, default=1, help="analysis processes")
+    parser.add_argument('--batch', type=int, default=64, help="games per batch and checkpoint")
+    parser.add_argument('--resume', action='store_true', help="continue from the output's checkpoint")
+    parser.add_argument('--quiet', action='store_true', help="do not print progress")
+    args = parser.parse_args(argv)
+
+    def report(stats: Dict[str, Any]) -> None:
+        print(f"{stats['total_games']} games, {stats['analyzed']} positions analyzed, "
+              f"{stats['cache_hits']} repeats skipped ({stats['time']:.1f}s)", flush=True)
+
+    stats = analyze_archive(args.input, args.output, args.engine, args.depth,
+                            args.solver_threshold, args.workers, args.batch, resume=args.resume,
+                            progress=None if args.quiet else report)
+    print(f"Annotated {stats['games']} games ({stats['positions']} positions, "
+          f"{stats['analyzed']} analyzed, {stats['cache_hits']} deduplicated) "
+          f"in {stats['time']:.1f}s ({stats['positions_per_second']:.0f} positions/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
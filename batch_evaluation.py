@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Batch Evaluation
+Scores and win checks for many positions at once with NumPy.
+
+Boards come either as an N x rows x cols array of 0/1/2 cells (row 0 at the
+top, like ConnectFourGame.board) or as packed bitboards, one uint64 per
+player per position, in the layout of bitboard.Position.  Every window of
+the winning-line index is counted for all positions in one pass, so the
+scores match ConnectFourGame._evaluate_sequence summed over the board.
+
+NumPy is optional for the rest of the game; only this module needs it.
+"""
+
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from bitboard import Position, WINDOW_SCORES
+from winning_lines import get_winning_lines
+
+
+def _require_numpy() -> None:
+    """Fail with an actionable message when NumPy is missing."""
+    if np is None:
+        raise ImportError("Batch evaluation needs NumPy; install it with 'pip install numpy'")
+
+
+def _popcount(values):
+    """Count the set bits of every element of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    values = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    values = (values & np.uint64(0x3333333333333333)) + ((values >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    values = (values + (values >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (values * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+class BatchEvaluator:
+    """Vectorized evaluation and win detection for one board geometry."""
+
+    def __init__(self, rows: int = 6, cols: int = 7):
+        _require_numpy()
+        self.rows = rows
+        self.cols = cols
+        self.stride = rows + 1
+        lines = get_winning_lines(rows, cols)
+
+        # Flat cell indices of every window, shape (windows, 4)
+        self.window_cells = np.array([[r * cols + c for r, c in line] for line in lines.lines],
+                                     dtype=np.intp)
+
+        # Window score by [ai_count, player_count], as in _evaluate_sequence
+        self.score_table = np.zeros((5, 5), dtype=np.int64)
+        for count in range(1, 5):
+            self.score_table[count, 0] = WINDOW_SCORES[count]
+            self.score_table[0, count] = -WINDOW_SCORES[count]
+
+        # Bitboard layout, available when a whole board fits in 64 bits
+        self.packable = cols * self.stride <= 64
+        if self.packable:
+            self.window_masks = np.array(lines.masks, dtype=np.uint64)
+            self.cell_bits = np.array([1 << lines.cell_bit(r, c)
+                                       for r in range(rows) for c in range(cols)], dtype=np.uint64)
+
+    def _as_boards(self, boards):
+        """Check and reshape boards to an (N, rows * cols) array."""
+        boards = np.asarray(boards)
+        if boards.shape[-2:] != (self.rows, self.cols):
+            raise ValueError(f"Expected boards of shape (N, {self.rows}, {self.cols}), "
+                             f"got {boards.shape}")
+        return boards.reshape(-1, self.rows * self.cols)
+
+    def _windows(self, boards):
+        """Gather the cells of every window, shape (N, windows, 4)."""
+        return self._as_boards(boards)[:, self.window_cells]
+
+    def _check_packable(self) -> None:
+        """Fail when boards of this geometry do not fit one uint64."""
+        if not self.packable:
+            raise ValueError(f"A {self.rows}x{self.cols} board does not fit a 64-bit bitboard")
+
+    def evaluate(self, boards):
+        """Score N boards from player 2's point of view, like _evaluate_board."""
+        if self.packable:
+            return self.evaluate_bitboards(*self.pack(boards))
+        windows = self._windows(boards)
+        ai_counts = np.count_nonzero(windows == 2, axis=2)
+        player_counts = np.count_nonzero(windows == 1, axis=2)
+        return self.score_table[ai_counts, player_counts].sum(axis=1)
+
+    def evaluate_bitboards(self, player1, player2):
+        """Score N packed positions given the bitboards of player 1 and player 2."""
+        self._check_packable()
+        player1 = np.asarray(player1, dtype=np.uint64)
+        player2 = np.asarray(player2, dtype=np.uint64)
+        score_table = self.score_table
+        scores = np.zeros(player1.shape, dtype=np.int64)
+        # One window at a time keeps the temporaries the size of the batch
+        for mask in self.window_masks:
+            ai_counts = _popcount(player2 & mask).astype(np.intp)
+            player_counts = _popcount(player1 & mask).astype(np.intp)
+            scores += score_table[ai_counts, player_counts]
+        return scores
+
+    def has_four(self, boards, player: int):
+        """Check which of N boards contain a four of the given player."""
+        return (self._windows(boards) == player).all(axis=2).any(axis=1)
+
+    def has_four_bitboards(self, bits):
+        """Check which of N bitboards contain four aligned pieces."""
+        self._check_packable()
+        bits = np.asarray(bits, dtype=np.uint64)
+        found = np.zeros(bits.shape, dtype=bool)
+        for shift in (1, self.stride, self.stride - 1, self.stride + 1):
+            pairs = bits & (bits >> np.uint64(shift))
+            found |= (pairs & (pairs >> np.uint64(2 * shift))) != 0
+        return found
+
+    def winners(self, boards):
+        """Get the winner of each of N boards: 1, 2, or 0 when nobody has four."""
+        windows = self._windows(boards)
+        result = np.zeros(len(windows), dtype=np.int8)
+        result[(windows == 2).all(axis=2).any(axis=1)] = 2
+        result[(windows == 1).all(axis=2).any(axis=1)] = 1
+        return result
+
+    def winners_bitboards(self, player1, player2):
+        """Get the winner of each of N packed positions: 1, 2, or 0."""
+        result = np.zeros(np.shape(player1), dtype=np.int8)
+        result[self.has_four_bitboards(player2)] = 2
+        result[self.has_four_bitboards(player1)] = 1
+        return result
+
+    def pack(self, boards) -> Tuple:
+        """Pack N boards into (player1, player2) uint64 bitboards."""
+        self._check_packable()
+        boards = self._as_boards(boards)
+        player1 = np.where(boards == 1, self.cell_bits, np.uint64(0)).sum(axis=1, dtype=np.uint64)
+        player2 = np.where(boards == 2, self.cell_bits, np.uint64(0)).sum(axis=1, dtype=np.uint64)
+        return player1, player2
+
+    def pack_positions(self, positions: Sequence[Position]) -> Tuple:
+        """Collect the bitboards of N positions into (player1, player2) arrays."""
+        self._check_packable()
+        player1 = np.fromiter((p.boards[0] for p in positions), dtype=np.uint64, count=len(positions))
+        player2 = np.fromiter((p.boards[1] for p in positions), dtype=np.uint64, count=len(positions))
+        return player1, player2
+
+    def evaluate_positions(self, positions: Sequence[Position]):
+        """Score N positions from player 2's point of view, like Position.evaluate."""
+        return self.evaluate_bitboards(*self.pack_positions(positions))
+
+
+@lru_cache(maxsize=None)
+def get_batch_evaluator(rows: int = 6, cols: int = 7) -> BatchEvaluator:
+    """Get the shared batch evaluator of a board geometry."""
+    return BatchEvaluator(rows, cols)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Engine Benchmarks
+Reproducible timings of the engine hot paths over a fixed corpus of early,
+mid and late game positions.
+
+Reports search nodes per second, time to each iterative-deepening depth,
+time per AI move for each difficulty, check_win/drop_piece throughput and
+the cost of importing the engine and creating a game, and writes everything
+as JSON so runs can be compared over time.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --quick
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from bitboard import Position
+from connect_four_game import ConnectFourGame
+from search import AlphaBetaSearch
+
+# Positions as 1-based column sequences, all undecided with no immediate win
+CORPUS = {
+    'early': ['', '4', '44', '4453', '445352'],
+    'mid': ['126565543633', '476347362234', '2577373341425447752'],
+    'late': ['6472333223442552674555', '25773733414254477525455366',
+             '64723332234425526745556647', '14175445577666755667115611'],
+}
+
+# AI settings used for every run, so local settings.json files do not skew results
+AI_SETTINGS = {
+    'search_depth': 4,
+    'search_time_ms': None,
+    'search_node_budget': None,
+    'search_workers': 1,
+    'solver_threshold': 20,
+    'opening_book': None,
+}
+
+
+def load_position(moves: str) -> Position:
+    """Build a corpus position from its move string."""
+    position = Position()
+    for char in moves:
+        position.play(int(char) - 1)
+    return position
+
+
+def corpus_positions() -> List[Dict[str, Any]]:
+    """List every corpus position with its phase."""
+    return [{'phase': phase, 'moves': moves}
+            for phase, sequences in CORPUS.items() for moves in sequences]
+
+
+def _make_game(moves: str, difficulty: str = 'hard') -> ConnectFourGame:
+    """Create a game at a corpus position with the benchmark AI settings."""
+    game = ConnectFourGame()
+    game.settings.update(AI_SETTINGS)
+    game.settings['ai_difficulty'] = difficulty
+    game.start_game()
+    for char in moves:
+        game.drop_piece(int(char) - 1)
+    game.searcher  # allocate the search cache here, not in the timed move
+    return game
+
+
+def _best_time(func: Callable[..., Any], repeat: int,
+               setup: Optional[Callable[[], Any]] = None) -> float:
+    """Run a function ``repeat`` times and return the fastest wall time.
+
+    When ``setup`` is given it runs untimed before each call and its result
+    is passed to the function.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Times a cold import of the engine and its first game in a fresh interpreter
+_STARTUP_SCRIPT = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import connect_four_game\n"
+    "imported = time.perf_counter()\n"
+    "connect_four_game.ConnectFourGame()\n"
+    "print(imported - start, time.perf_counter() - imported, 'tkinter' in sys.modules)\n"
+)
+
+
+def bench_startup(repeat: int, iterations: int) -> Dict[str, Any]:
+    """Engine import time in a fresh process and ConnectFourGame() construction time."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    process_time = import_time = first_game_time = float('inf')
+    tkinter_loaded = False
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout
+        process_time = min(process_time, time.perf_counter() - start)
+        imported, constructed, loaded = output.split()
+        import_time = min(import_time, float(imported))
+        first_game_time = min(first_game_time, float(constructed))
+        tkinter_loaded = loaded == 'True'
+
+    construct_time = _best_time(lambda: [ConnectFourGame() for _ in range(iterations)], repeat)
+    return {
+        'process_seconds': process_time,
+        'import_seconds': import_time,
+        'first_game_seconds': first_game_time,
+        'construct_seconds': construct_time / iterations,
+        'tkinter_loaded': tkinter_loaded,
+    }
+
+
+def _cold_searcher(searcher: AlphaBetaSearch) -> AlphaBetaSearch:
+    """Empty a searcher's table and node count, outside the timed call."""
+    searcher.table.clear()
+    searcher.nodes = 0
+    return searcher
+
+
+def bench_search(depth: int, repeat: int) -> List[Dict[str, Any]]:
+    """Fixed-depth alpha-beta search from a cold table: nodes per second."""
+    results = []
+    for entry in corpus_positions():
+        position = load_position(entry['moves'])
+        searcher = AlphaBetaSearch()
+        nodes = 0
+
+        def run(searcher: AlphaBetaSearch) -> None:
+            nonlocal nodes
+            searcher.search(position, depth)
+            nodes = searcher.nodes
+
+        elapsed = _best_time(run, repeat, setup=lambda: _cold_searcher(searcher))
+        results.append(dict(entry, depth=depth, nodes=nodes, seconds=elapsed,
+                            nodes_per_second=nodes / elapsed if elapsed else 0.0))
+    return results
+
+
+def bench_time_to_depth(max_depth: int, repeat: int) -> List[Dict[str, Any]]:
+    """Iterative deepening from a cold table: time to complete each depth."""
+    results = []
+    for entry in corpus_positions():
+        if entry['phase'] == 'late':
+            continue  # late positions finish every depth almost at once
+        position = load_position(entry['moves'])
+        searcher = AlphaBetaSearch()
+        depths = []
+        for depth in range(1, max_depth + 1):
+            elapsed = _best_time(
+                lambda searcher: searcher.iterative_deepening(position, max_depth=depth), repeat,
+                setup=lambda: _cold_searcher(searcher))
+            depths.append({'depth': depth, 'seconds': elapsed})
+        results.append(dict(entry, depths=depths))
+    return results
+
+
+def bench_ai_moves(repeat: int) -> List[Dict[str, Any]]:
+    """Time per get_ai_move call for each difficulty, from a fresh game."""
+    results = []
+    for difficulty in ('easy', 'medium', 'hard'):
+        for entry in corpus_positions():
+            elapsed = _best_time(lambda game: game.choose_move(), repeat,
+                                 setup=lambda: _make_game(entry['moves'], difficulty))
+            results.append(dict(entry, difficulty=difficulty, seconds=elapsed))
+    return results
+
+
+def bench_game_ops(iterations: int) -> Dict[str, Any]:
+    """Throughput of check_win and drop_piece/undo_move on corpus positions."""
+    check_calls = drop_calls = 0
+    check_time = drop_time = 0.0
+    for entry in corpus_positions():
+        game = _make_game(entry['moves'])
+        player = game.current_player
+        position = game.position
+
+        # Occupied cells of the side to move
+        cells = [(row, col) for row in range(game.ROWS) for col in range(game.COLS)
+                 if game.board[row][col] == player]
+        if cells:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                for row, col in cells:
+                    game.check_win(row, col, player)
+            check_time += time.perf_counter() - start
+            check_calls += iterations * len(cells)
+
+        # Columns that do not end the game, so drop_piece never saves stats
+        columns = [col for col in position.playable_columns()
+                   if not position.is_winning_move(col, player)
+                   and position.moves + 1 < game.ROWS * game.COLS]
+        if columns:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                for col in columns:
+                    game.drop_piece(col)
+                    game.undo_move()
+            drop_time += time.perf_counter() - start
+            drop_calls += iterations * len(columns)
+
+    return {
+        'check_win_calls': check_calls,
+        'check_win_per_second': check_calls / check_time if check_time else 0.0,
+        'drop_undo_calls': drop_calls,
+        'drop_undo_per_second': drop_calls / drop_time if drop_time else 0.0,
+    }
+
+
+def run_benchmarks(quick: bool = False) -> Dict[str, Any]:
+    """Run the whole suite and return its results."""
+    random.seed(0)
+    repeat = 1 if quick else 3
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'search': bench_search(4 if quick else 6, repeat),
+        'time_to_depth': bench_time_to_depth(5 if quick else 8, repeat),
+        'ai_move': bench_ai_moves(repeat),
+        'game_ops': bench_game_ops(200 if quick else 2000),
+        'startup': bench_startup(3 if quick else 10, 100 if quick else 1000),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Summarize a benchmark report for the terminal."""
+    lines = [f"Python {report['python']} ({report['implementation']}) on {report['platform']}", ""]
+
+    lines.append("Search (fixed depth, cold table)")
+    for row in report['search']:
+        lines.append(f"  {row['phase']:<5} {row['moves'] or '-':<28} depth {row['depth']}  "
+                     f"{row['nodes']:>8} nodes  {row['nodes_per_second']:>10.0f} nodes/s")
+
+    lines.append("")
+    lines.append("Time to depth (seconds)")
+    for row in report['time_to_depth']:
+        times = "  ".join(f"{d['depth']}:{d['seconds']:.3f}" for d in row['depths'])
+        lines.append(f"  {row['phase']:<5} {row['moves'] or '-':<28} {times}")
+
+    lines.append("")
+    lines.append("AI move time (milliseconds, mean over corpus)")
+    for difficulty in ('easy', 'medium', 'hard'):
+        rows = [row for row in report['ai_move'] if row['difficulty'] == difficulty]
+        for phase in CORPUS:
+            phase_rows = [row['seconds'] for row in rows if row['phase'] == phase]
+            mean = sum(phase_rows) / len(phase_rows) * 1000
+            lines.append(f"  {difficulty:<6} {phase:<5} {mean:9.2f}")
+
+    ops = report['game_ops']
+    lines.append("")
+    lines.append(f"check_win:        {ops['check_win_per_second']:>12.0f} calls/s")
+    lines.append(f"drop_piece+undo:  {ops['drop_undo_per_second']:>12.0f} pairs/s")
+
+    startup = report['startup']
+    lines.append("")
+    lines.append(f"Engine import:    {startup['import_seconds'] * 1000:>9.2f} ms "
+                 f"({startup['process_seconds'] * 1000:.1f} ms with interpreter start"
+                 f"{', loads tkinter' if startup['tkinter_loaded'] else ''})")
+    lines.append(f"First game:       {startup['first_game_seconds'] * 1000:>9.2f} ms")
+    lines.append(f"ConnectFourGame(): {startup['construct_seconds'] * 1000:>8.3f} ms")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the Connect Four engine.")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--quick', action='store_true', help="shallower searches, fewer repeats")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.quick)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Bitboard Position Engine
+Compact Connect Four position built from two integers and per-column heights.
+
+Cells are stored column-major with one spare sentinel bit on top of every
+column, so bit ``col * (rows + 1) + height`` is the cell ``height`` pieces up
+from the bottom of ``col``.  The sentinel row keeps shifted lines from wrapping
+into the next column, which makes four-in-a-row detection a handful of shifts.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from winning_lines import get_winning_lines
+
+# Scores of a four-cell window holding 0..4 pieces of one player and no
+# opposing pieces; these mirror ConnectFourGame._evaluate_sequence.
+WINDOW_SCORES = (0, 10, 100, 1000, 1000000)
+
+
+def has_four(bits: int, stride: int) -> bool:
+    """Check whether a bitboard contains four aligned pieces."""
+    for shift in (1, stride, stride - 1, stride + 1):
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+def winning_cells(bits: int, mask: int, stride: int, board_mask: int) -> int:
+    """Bitboard of empty cells that would complete a four for the pieces in ``bits``."""
+    # vertical
+    result = (bits << 1) & (bits << 2) & (bits << 3)
+
+    # horizontal and both diagonals
+    for shift in (stride, stride - 1, stride + 1):
+        pair = (bits << shift) & (bits << 2 * shift)
+        result |= pair & (bits << 3 * shift)
+        result |= pair & (bits >> shift)
+        pair = (bits >> shift) & (bits >> 2 * shift)
+        result |= pair & (bits << shift)
+        result |= pair & (bits >> 3 * shift)
+
+    return result & (board_mask ^ mask)
+
+
+def mirror_bits(bits: int, cols: int, stride: int) -> int:
+    """Mirror a column-major bitboard (or key) left to right."""
+    column = (1 << stride) - 1
+    result = 0
+    for col in range(cols):
+        result |= ((bits >> (col * stride)) & column) << ((cols - 1 - col) * stride)
+    return result
+
+
+def canonical_key(key: int, cols: int, stride: int) -> Tuple[int, bool]:
+    """Get the smaller of a key and its mirror, and whether the mirror was taken."""
+    mirrored = mirror_bits(key, cols, stride)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+def popcount(bits: int) -> int:
+    """Count the set bits of a non-negative integer."""
+    return bin(bits).count('1')
+
+
+class Position:
+    """Connect Four position with O(1) play/undo on two bitboards."""
+
+    __slots__ = ('rows', 'cols', 'stride', 'boards', 'heights', 'moves',
+                 'history', 'bottom_mask', 'board_mask', 'column_masks',
+                 'bottom_bits', 'lines', 'windows')
+
+    def __init__(self, rows: int = 6, cols: int = 7):
+        self.rows = rows
+        self.cols = cols
+        self.stride = rows + 1
+        self.boards = [0, 0]  # pieces of player 1 and player 2
+        self.heights = [0] * cols
+        self.moves = 0
+        self.history: List[int] = []
+
+        self.bottom_bits = [1 << (col * self.stride) for col in range(cols)]
+        self.column_masks = [((1 << rows) - 1) << (col * self.stride)
+                             for col in range(cols)]
+        self.bottom_mask = sum(self.bottom_bits)
+        self.board_mask = sum(self.column_masks)
+        self.lines = get_winning_lines(rows, cols)
+        self.windows = self.lines.masks
+
+    @classmethod
+    def from_board(cls, board: Sequence[Sequence[int]]) -> 'Position':
+        """Build a position from a top-down list-of-lists board."""
+        rows, cols = len(board), len(board[0])
+        position = cls(rows, cols)
+        for col in range(cols):
+            for row in range(rows - 1, -1, -1):
+                piece = board[row][col]
+                if piece == 0:
+                    break
+                position.boards[piece - 1] |= position.bit(col, position.heights[col])
+                position.heights[col] += 1
+                position.moves += 1
+        return position
+
+    def to_board(self) -> List[List[int]]:
+        """Render the position as a top-down list-of-lists board."""
+        board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        for col in range(self.cols):
+            for height in range(self.heights[col]):
+                bit = self.bit(col, height)
+                board[self.rows - 1 - height][col] = 1 if self.boards[0] & bit else 2
+        return board
+
+    def copy(self) -> 'Position':
+        """Return an independent copy of the position."""
+        clone = Position.__new__(Position)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.boards = self.boards[:]
+        clone.heights = self.heights[:]
+        clone.history = self.history[:]
+        return clone
+
+    def bit(self, col: int, height: int) -> int:
+        """Get the bit of the cell ``height`` pieces up from the bottom of ``col``."""
+        return 1 << (col * self.stride + height)
+
+    @property
+    def mask(self) -> int:
+        """Bitboard of all occupied cells."""
+        return self.boards[0] | self.boards[1]
+
+    @property
+    def current_player(self) -> int:
+        """Player (1 or 2) whose turn it is."""
+        return 1 + (self.moves & 1)
+
+    def can_play(self, col: int) -> bool:
+        """Check whether a column still has room."""
+        return 0 <= col < self.cols and self.heights[col] < self.rows
+
+    def playable_mask(self) -> int:
+        """Bitmask with bit ``col`` set for every column that is not full."""
+        result = 0
+        rows = self.rows
+        for col, height in enumerate(self.heights):
+            if height < rows:
+                result |= 1 << col
+        return result
+
+    def playable_columns(self) -> List[int]:
+        """List the columns that are not full, left to right."""
+        rows = self.rows
+        return [col for col, height in enumerate(self.heights) if height < rows]
+
+    def possible(self) -> int:
+        """Bitboard of the cells the next piece can land on."""
+        return (self.mask + self.bottom_mask) & self.board_mask
+
+    def play(self, col: int) -> int:
+        """Drop the side to move's piece in ``col`` and return the row it landed in."""
+        height = self.heights[col]
+        self.boards[self.moves & 1] |= self.bottom_bits[col] << height
+        self.heights[col] = height + 1
+        self.moves += 1
+        self.history.append(col)
+        return self.rows - 1 - height
+
+    def undo(self) -> int:
+        """Take back the last move and return its column."""
+        col = self.history.pop()
+        self.moves -= 1
+        height = self.heights[col] - 1
+        self.heights[col] = height
+        self.boards[self.moves & 1] ^= self.bottom_bits[col] << height
+        return col
+
+    def is_win(self, player: int) -> bool:
+        """Check whether ``player`` has four in a row."""
+        return has_four(self.boards[player - 1], self.stride)
+
+    def is_winning_move(self, col: int, player: int) -> bool:
+        """Check whether dropping ``player``'s piece in a playable ``col`` wins."""
+        cell = col * self.stride + self.heights[col]
+        bits = self.boards[player - 1] | (1 << cell)
+        for line in self.lines.bit_masks[cell]:
+            if bits & line == line:
+                return True
+        return False
+
+    def winning_cells(self, player: int) -> int:
+        """Bitboard of empty cells that would complete a four for ``player``."""
+        return winning_cells(self.boards[player - 1], self.mask, self.stride, self.board_mask)
+
+    def key(self) -> int:
+        """Unique integer key of the position."""
+        return self.boards[0] + self.mask + self.bottom_mask
+
+    def canonical_key(self) -> Tuple[int, bool]:
+        """Key shared by the position and its mirror image, and whether it is mirrored.
+
+        Moves stored under a mirrored key must be flipped with ``mirror_column``.
+        """
+        return canonical_key(self.key(), self.cols, self.stride)
+
+    def mirror_column(self, col: int) -> int:
+        """Map a column to its mirror image."""
+        return self.cols - 1 - col if col >= 0 else col
+
+    def evaluate(self) -> int:
+        """Static evaluation from player 2's point of view."""
+        ai_pieces, player_pieces = self.boards[1], self.boards[0]
+        score = 0
+        for window in self.windows:
+            ai = window & ai_pieces
+            player = window & player_pieces
+            if ai:
+                if not player:
+                    score += WINDOW_SCORES[bin(ai).count('1')]
+            elif player:
+                score -= WINDOW_SCORES[bin(player).count('1')]
+        return score
+
+    def winning_column(self, order: Optional[Sequence[int]] = None) -> int:
+        """Get the first column that wins at once for the side to move, or -1."""
+        wins = self.winning_cells(self.current_player) & self.possible()
+        if wins:
+            for col in (order if order is not None else range(self.cols)):
+                if wins & self.column_masks[col]:
+                    return col
+        return -1
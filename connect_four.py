@@ -4,13 +4,21 @@ Modern Connect Four Game - Clean Version
 A beautiful, modern Connect Four game with AI opponent and engaging features.
 """
 
+import queue
+import threading
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import messagebox
 from connect_four_game import ConnectFourGame
+from search import SearchTimeout
 
 class ConnectFourGUI:
     """Modern Connect Four GUI with clean, professional design."""
     
+    # Milliseconds between drop animation frames (about 60 fps)
+    DROP_FRAME_MS = 16
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Connect Four - Modern Edition")
@@ -18,7 +26,7 @@ class ConnectFourGUI:
         self.root.configure(bg='#f0f0f0')
         
         # Game instance
-        self.game = ConnectFourGame()
+        self.game = ConnectFourGame(persistent=True)
         
         # Modern color scheme
         self.colors = {
@@ -36,6 +44,22 @@ class ConnectFourGUI:
         self.cell_size = 60
         self.padding = 20
         
+        # Persistent board items: moves recolor cells instead of redrawing
+        self.piece_items = []
+        self.shown_board = []
+        self.drop_item = None
+        self.drop_cell = None  # (row, col, piece) while a drop is animated
+        self.drop_start = 0.0
+        self.drop_duration = 0.0
+        self.drop_animation = None  # after() id of the next animation frame
+        self.redraw_times = deque(maxlen=200)  # draw_board durations in ms
+        
+        # Background AI search; results from older generations are stale
+        self.ai_generation = 0
+        self.ai_thinking = False
+        self.ai_results = queue.Queue()
+        self.ai_worker = None  # the last search thread, alive until its engine lets go
+        
         self.create_widgets()
         self.game.start_game()
         self.draw_board()
@@ -104,6 +128,12 @@ class ConnectFourGUI:
                                     font=('Arial', 12, 'bold'),
                                     bg=self.colors['panel'], fg=self.colors['text'])
         self.current_label.pack(pady=10)
+        
+        # AI thinking indicator
+        self.thinking_label = tk.Label(left_frame, text="",
+                                       font=('Arial', 11, 'italic'),
+                                       bg=self.colors['panel'], fg=self.colors['header'])
+        self.thinking_label.pack(pady=5)
     
     def create_center_panel(self, parent):
         """Create the center panel with the game board."""
@@ -119,6 +149,7 @@ class ConnectFourGUI:
         self.canvas = tk.Canvas(center_frame, width=canvas_size, height=canvas_size,
                                bg=self.colors['board_bg'])
         self.canvas.pack(pady=10)
+        self.create_board_items()
         
         # Column indicators
         indicators_frame = tk.Frame(center_frame, bg=self.colors['panel'])
@@ -163,6 +194,20 @@ class ConnectFourGUI:
                                  state='disabled')
         self.undo_btn.pack(pady=5)
         
+        self.redo_btn = tk.Button(right_frame, text="↷ Redo",
+                                 command=self.redo_move,
+                                 bg='#f59e0b', fg='white',
+                                 font=('Arial', 10, 'bold'), width=15,
+                                 state='disabled')
+        self.redo_btn.pack(pady=5)
+        
+        self.cancel_btn = tk.Button(right_frame, text="✋ Cancel AI",
+                                   command=self.cancel_ai_move,
+                                   bg='#ef4444', fg='white',
+                                   font=('Arial', 10, 'bold'), width=15,
+                                   state='disabled')
+        self.cancel_btn.pack(pady=5)
+        
         # Game mode selection
         tk.Label(right_frame, text="Game Mode", font=('Arial', 12, 'bold'),
                 bg=self.colors['panel'], fg=self.colors['text']).pack(pady=(20, 5))
@@ -186,31 +231,113 @@ class ConnectFourGUI:
                                    bg=self.colors['header'], fg='white')
         self.status_label.pack(fill='x', pady=(20, 0))
     
-    def draw_board(self):
-        """Draw the game board on the canvas."""
-        self.canvas.delete("all")
-        
+    def create_board_items(self):
+        """Create every slot and piece oval once; pieces start hidden."""
+        self.piece_items = []
         for row in range(self.game.ROWS):
+            items = []
             for col in range(self.game.COLS):
                 x1 = self.padding + col * self.cell_size
                 y1 = self.padding + row * self.cell_size
                 x2 = x1 + self.cell_size
                 y2 = y1 + self.cell_size
                 
-                # Draw slot
                 self.canvas.create_oval(x1 + 5, y1 + 5, x2 - 5, y2 - 5,
                                       fill=self.colors['slot'], outline='white')
-                
-                # Draw piece if present
-                if self.game.board[row][col] != 0:
-                    color = (self.colors['red'] if self.game.board[row][col] == 1 
-                            else self.colors['yellow'])
-                    self.canvas.create_oval(x1 + 8, y1 + 8, x2 - 8, y2 - 8,
-                                          fill=color, outline='white')
+                items.append(self.canvas.create_oval(x1 + 8, y1 + 8, x2 - 8, y2 - 8,
+                                                     fill=self.colors['slot'], outline='white',
+                                                     state='hidden'))
+            self.piece_items.append(items)
+        self.shown_board = [[0 for _ in range(self.game.COLS)] for _ in range(self.game.ROWS)]
+        
+        # Falling piece of the drop animation, drawn above the board
+        self.drop_item = self.canvas.create_oval(0, 0, 0, 0, outline='white', state='hidden')
+    
+    def draw_board(self):
+        """Bring the board canvas up to date, touching only the cells that changed."""
+        start = time.perf_counter()
+        self.finish_drop_animation()
+        
+        board = self.game.board
+        changed = [(row, col) for row in range(self.game.ROWS) for col in range(self.game.COLS)
+                   if board[row][col] != self.shown_board[row][col]]
+        
+        # A single new piece is a move: let it fall into place
+        dropped = None
+        if (len(changed) == 1 and self.game.settings['animations_enabled']
+                and board[changed[0][0]][changed[0][1]] != 0):
+            dropped = changed.pop()
+        
+        for row, col in changed:
+            self.set_cell(row, col, board[row][col])
+        if dropped is not None:
+            self.start_drop_animation(dropped[0], dropped[1], board[dropped[0]][dropped[1]])
+        
+        self.redraw_times.append((time.perf_counter() - start) * 1000)
+    
+    def set_cell(self, row, col, piece):
+        """Show a cell's piece, or hide it for an empty cell."""
+        item = self.piece_items[row][col]
+        if piece == 0:
+            self.canvas.itemconfigure(item, state='hidden')
+        else:
+            color = self.colors['red'] if piece == 1 else self.colors['yellow']
+            self.canvas.itemconfigure(item, fill=color, state='normal')
+        self.shown_board[row][col] = piece
+    
+    def start_drop_animation(self, row, col, piece):
+        """Start a piece falling from above the board into its cell."""
+        self.drop_cell = (row, col, piece)
+        self.drop_start = time.perf_counter()
+        self.drop_duration = 0.05 + 0.04 * (row + 1)  # seconds, longer for lower cells
+        color = self.colors['red'] if piece == 1 else self.colors['yellow']
+        self.canvas.itemconfigure(self.drop_item, fill=color, state='normal')
+        self.animate_drop()
+    
+    def animate_drop(self):
+        """Draw one animation frame where the piece should be by now."""
+        self.drop_animation = None
+        if self.drop_cell is None:
+            return
+        row, col, _ = self.drop_cell
+        
+        # Positions follow the clock, so late frames skip ahead instead of lagging
+        progress = min((time.perf_counter() - self.drop_start) / self.drop_duration, 1.0)
+        if progress >= 1.0:
+            self.finish_drop_animation()
+            return
+        
+        start_y = self.padding - self.cell_size
+        end_y = self.padding + row * self.cell_size
+        y1 = start_y + (end_y - start_y) * progress * progress
+        x1 = self.padding + col * self.cell_size
+        self.canvas.coords(self.drop_item, x1 + 8, y1 + 8,
+                           x1 + self.cell_size - 8, y1 + self.cell_size - 8)
+        self.drop_animation = self.root.after(self.DROP_FRAME_MS, self.animate_drop)
+    
+    def finish_drop_animation(self):
+        """End a running drop animation with its piece shown in place."""
+        if self.drop_cell is None:
+            return
+        if self.drop_animation is not None:
+            self.root.after_cancel(self.drop_animation)
+            self.drop_animation = None
+        self.canvas.itemconfigure(self.drop_item, state='hidden')
+        row, col, piece = self.drop_cell
+        self.drop_cell = None
+        self.set_cell(row, col, piece)
+    
+    def get_redraw_stats(self):
+        """Get the count, last, mean and worst draw_board times in milliseconds."""
+        times = list(self.redraw_times)
+        if not times:
+            return {'redraws': 0, 'last_ms': 0.0, 'mean_ms': 0.0, 'max_ms': 0.0}
+        return {'redraws': len(times), 'last_ms': times[-1],
+                'mean_ms': sum(times) / len(times), 'max_ms': max(times)}
     
     def on_click(self, event):
         """Handle canvas click events."""
-        if self.game.game_state != 'playing':
+        if self.game.game_state != 'playing' or self.ai_thinking:
             return
         
         col = (event.x - self.padding) // self.cell_size
@@ -232,20 +359,105 @@ class ConnectFourGUI:
                 self.root.after(500, self.make_ai_move)
     
     def make_ai_move(self):
-        """Make an AI move."""
+        """Start the AI search in a background thread."""
+        if self.ai_thinking:
+            return
         if self.game.game_state == 'playing' and self.game.current_player == 2:
-            col = self.game.get_ai_move()
-            if col != -1:
-                self.make_move(col)
+            if self.ai_worker is not None and self.ai_worker.is_alive():
+                # A cancelled search still holds the engines; start once it stops
+                self.root.after(20, self.make_ai_move)
+                return
+            # Settle pondering and earlier cancels here, so a cancel that
+            # comes before the worker reaches the search still stops it
+            self.game.stop_pondering()
+            self.game.clear_ai_cancel()
+            self.ai_generation += 1
+            position = self.game.position.copy()
+            self.ai_worker = threading.Thread(target=self._search_ai_move,
+                                              args=(self.ai_generation, position),
+                                              daemon=True)
+            self.set_thinking(True)
+            self.ai_worker.start()
+            self.root.after(50, self.poll_ai_move)
+    
+    def _search_ai_move(self, generation, position):
+        """Run the AI search on a copy of the position (worker thread).
+        
+        Posts (generation, column, error); a failed search posts the most
+        central playable column with the error so the game can go on.
+        """
+        error = None
+        try:
+            col = self.game.get_ai_move(position)
+        except SearchTimeout:
+            col = -1
+        except Exception as exc:
+            center = (self.game.COLS - 1) / 2
+            playable = sorted(position.playable_columns(), key=lambda c: abs(c - center))
+            col = playable[0] if playable else -1
+            error = str(exc) or type(exc).__name__
+        self.ai_results.put((generation, col, error))
+    
+    def poll_ai_move(self):
+        """Check for a finished AI search and play its move if still current."""
+        try:
+            generation, col, error = self.ai_results.get_nowait()
+        except queue.Empty:
+            if self.ai_thinking:
+                self.root.after(50, self.poll_ai_move)
+            return
+        
+        if generation != self.ai_generation:
+            # Stale result from before an undo, reset or cancel
+            if self.ai_thinking:
+                self.root.after(50, self.poll_ai_move)
+            return
+        
+        self.set_thinking(False)
+        if col != -1:
+            self.make_move(col)
+            if error is not None and self.game.game_state == 'playing':
+                self.status_label.config(text=f"AI search failed ({error}) - it played a fallback move")
+            if (self.game.game_state == 'playing' and self.game.current_player == 1
+                    and self.mode_var.get() == 'pve'):
+                # Think about the likely replies while the player does
+                self.game.start_pondering()
+    
+    def set_thinking(self, thinking):
+        """Show or hide the AI thinking indicator."""
+        self.ai_thinking = thinking
+        self.thinking_label.config(text="🤖 AI is thinking..." if thinking else "")
+        self.cancel_btn.config(state='normal' if thinking else 'disabled')
+    
+    def stop_ai_search(self):
+        """Invalidate any running AI search and ask it to stop."""
+        self.ai_generation += 1
+        self.game.stop_pondering()
+        if self.ai_thinking:
+            self.game.cancel_ai_move()
+            self.set_thinking(False)
+    
+    def cancel_ai_move(self):
+        """Cancel the AI search and take back the move it was answering."""
+        if not self.ai_thinking:
+            return
+        self.stop_ai_search()
+        self.game.undo_move()
+        self.draw_board()
+        self.update_status()
+        self.status_label.config(text="AI move cancelled - your turn again!")
     
     def start_game(self):
         """Start a new game."""
+        self.stop_ai_search()
         self.game.start_game()
+        self.draw_board()
         self.update_status()
         self.status_label.config(text="Game started!")
     
     def reset_game(self):
         """Reset the current game."""
+        self.stop_ai_search()
         self.game.reset_game()
         self.game.start_game()
         self.draw_board()
@@ -254,11 +466,22 @@ class ConnectFourGUI:
     
     def undo_move(self):
         """Undo the last move."""
+        self.stop_ai_search()
         if self.game.undo_move():
             self.draw_board()
             self.update_status()
             self.status_label.config(text="Move undone!")
     
+    def redo_move(self):
+        """Replay the last undone move."""
+        self.stop_ai_search()
+        if self.game.redo_move():
+            self.draw_board()
+            self.update_status()
+            self.status_label.config(text="Move redone!")
+            if self.game.game_state == 'finished':
+                self.show_game_over()
+    
     def update_status(self):
         """Update the game status display."""
         if self.game.game_state == 'playing':
@@ -282,11 +505,11 @@ class ConnectFourGUI:
         if self.game.game_state == 'playing':
             self.start_btn.config(state='disabled')
             self.reset_btn.config(state='normal')
-            self.undo_btn.config(state='normal' if self.game.move_history else 'disabled')
         else:
             self.start_btn.config(state='normal')
             self.reset_btn.config(state='normal')
-            self.undo_btn.config(state='disabled')
+        self.undo_btn.config(state='normal' if self.game.move_history else 'disabled')
+        self.redo_btn.config(state='normal' if self.game.redo_moves else 'disabled')
     
     def show_game_over(self):
         """Show the game over dialog."""
@@ -2,25 +2,41 @@
 """
 Modern Connect Four Game - 2025 Edition
 A beautiful, engaging Connect Four game with modern UI design, AI opponent, and advanced features.
+
+This module is the headless engine: it needs no Tk, touches no files
+unless persistence is asked for, and imports the process pools, opening
+book, MCTS and instrumentation only when a setting first uses them, so
+tools and worker processes can create games cheaply.
 """
 
-import tkinter as tk
-from tkinter import ttk, messagebox
 import random
 import time
 import json
 import os
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Callable, TYPE_CHECKING
 import threading
-import math
+from contextlib import nullcontext
+from bitboard import Position
+from transposition import TranspositionTable
+from search import AlphaBetaSearch, SearchTimeout
+from solver import Solver, solve
+from game_state import GameState
+from stats_log import DEFAULT_STATS, StatsLog, fold_game
+
+if TYPE_CHECKING:
+    from instrumentation import SearchStats
+    from mcts import MCTS, ParallelMCTS
+    from opening_book import OpeningBook
+    from parallel_search import ParallelRootSearch
 
 class ConnectFourGame:
     """Modern Connect Four game engine with optimized algorithms."""
     
-    def __init__(self):
+    def __init__(self, persistent: bool = False):
         self.ROWS = 6
         self.COLS = 7
         self.board = [[0 for _ in range(self.COLS)] for _ in range(self.ROWS)]
+        self.position = Position(self.ROWS, self.COLS)
         self.current_player = 1
         self.game_state = 'waiting'  # waiting, playing, paused, finished
         self.winner = None
@@ -28,33 +44,68 @@ class ConnectFourGame:
         self.game_start_time = None
         self.game_end_time = None
         self.move_count = 0
+        self.redo_moves: List[int] = []  # undone columns, most recent last
+        self.stats_recorded = False  # the result was counted; undo and redo do not recount it
         
         # Settings
         self.settings = {
             'game_mode': 'pve',  # pvp, pve
-            'ai_difficulty': 'medium',  # easy, medium, hard
+            'ai_difficulty': 'medium',  # easy, medium, hard, mcts
             'sound_enabled': True,
             'animations_enabled': True,
-            'theme': 'dark'  # light, dark
+            'theme': 'dark',  # light, dark
+            'tt_max_bytes': 16 * 1024 * 1024,
+            'tt_replacement': 'depth',  # depth, always
+            'search_depth': 4,  # hard AI fixed search depth
+            'search_time_ms': None,  # hard AI time budget per move
+            'search_node_budget': None,  # hard AI node budget per move
+            'search_workers': 1,  # processes for the hard AI's root search
+            'solver_threshold': 20,  # empty cells at which the hard AI plays perfectly
+            'opening_book': None,  # path of an opening book file for the hard AI
+            'mcts_iterations': 5000,  # MCTS AI iteration budget per move
+            'mcts_time_ms': None,  # MCTS AI time budget per move
+            'mcts_workers': 1,  # processes growing MCTS trees in parallel
+            'mcts_exploration': 1.4,  # UCT exploration constant
+            'pondering': True,  # hard AI searches the likely replies on the player's time
+            'stats_buffer_size': 0,  # finished games held in memory before writing them
+            'stats_compact_every': 200  # logged games between folds into stats.json
         }
         
-        # Statistics
-        self.stats = {
-            'games_played': 0,
-            'player1_wins': 0,
-            'player2_wins': 0,
-            'best_time': None,
-            'total_moves': 0,
-            'win_streak': 0,
-            'longest_streak': 0
-        }
+        # Settings and statistics files are only used when asked for
+        self.persistent = persistent
+        self.stats_log: Optional[StatsLog] = None
+        self.session_stats = dict(DEFAULT_STATS)  # games of this session when not persistent
+        if persistent:
+            self.load_settings()
+            self.load_stats()
         
-        self.load_settings()
-        self.load_stats()
+        # Search cache, kept across AI moves of the same game and allocated
+        # on first use, see the transposition_table and searcher properties
+        self._transposition_table: Optional[TranspositionTable] = None
+        self._searcher: Optional[AlphaBetaSearch] = None
+        self.parallel_search: Optional['ParallelRootSearch'] = None
+        self.solver: Optional[Solver] = None
+        self.opening_book: Optional['OpeningBook'] = None
+        self._failed_book: Optional[str] = None  # book path that could not be opened
+        self.mcts: Optional['MCTS'] = None
+        self.parallel_mcts: Optional['ParallelMCTS'] = None
+        self.last_search: Optional[Dict[str, Any]] = None
+        
+        # Opt-in search instrumentation, see enable_search_stats()
+        self.search_stats: Optional['SearchStats'] = None
+        self.search_stats_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.last_profile = None
+        
+        # Pondering: best answers to the player's likely replies, by position key
+        self.ponder_results: Dict[int, Tuple[Tuple, Dict[str, Any]]] = {}
+        self._ponder_thread: Optional[threading.Thread] = None
+        self._ponder_stop = threading.Event()
+        self._ai_cancelled = False  # set by cancel_ai_move until clear_ai_cancel
     
     def reset_game(self) -> None:
         """Reset the game to initial state."""
         self.board = [[0 for _ in range(self.COLS)] for _ in range(self.ROWS)]
+        self.position = Position(self.ROWS, self.COLS)
         self.current_player = 1
         self.game_state = 'waiting'
         self.winner = None
@@ -62,6 +113,32 @@ class ConnectFourGame:
         self.game_start_time = None
         self.game_end_time = None
         self.move_count = 0
+        self.redo_moves = []
+        self.stats_recorded = False
+        self.stop_pondering()
+        self.ponder_results = {}
+        if self._transposition_table is not None:
+            self._transposition_table.clear()
+    
+    @property
+    def transposition_table(self) -> TranspositionTable:
+        """Get the search cache, allocating it when first needed."""
+        if self._transposition_table is None:
+            self._transposition_table = TranspositionTable(
+                max_bytes=self.settings['tt_max_bytes'],
+                replacement=self.settings['tt_replacement'])
+        return self._transposition_table
+    
+    @property
+    def searcher(self) -> AlphaBetaSearch:
+        """Get the alpha-beta searcher, created with the search cache."""
+        if self._searcher is None:
+            self._searcher = self._new_engine(AlphaBetaSearch(self.transposition_table))
+        return self._searcher
+    
+    @searcher.setter
+    def searcher(self, searcher: AlphaBetaSearch) -> None:
+        self._searcher = self._new_engine(searcher)
     
     def start_game(self) -> None:
         """Start a new game."""
@@ -74,233 +151,478 @@ class ConnectFourGame:
         if self.game_state != 'playing':
             return False
         
-        if col < 0 or col >= self.COLS:
-            return False
+        if not self.position.can_play(col):
+            return False  # Out of range or column is full
         
-        # Find the lowest available row
-        for row in range(self.ROWS - 1, -1, -1):
-            if self.board[row][col] == 0:
-                self.board[row][col] = self.current_player
-                self.move_history.append({
-                    'row': row, 'col': col, 'player': self.current_player,
-                    'timestamp': time.time()
-                })
-                self.move_count += 1
-                
-                # Check for win
-                if self.check_win(row, col, self.current_player):
-                    self.game_state = 'finished'
-                    self.winner = self.current_player
-                    self.game_end_time = time.time()
-                    self.update_stats()
-                    return True
-                
-                # Check for draw
-                if self.is_board_full():
-                    self.game_state = 'finished'
-                    self.winner = 0  # Draw
-                    self.game_end_time = time.time()
-                    return True
-                
-                self.switch_player()
-                return True
+        row = self.position.play(col)
+        self.board[row][col] = self.current_player
+        self.move_history.append({
+            'row': row, 'col': col, 'player': self.current_player,
+            'timestamp': time.time()
+        })
+        self.move_count += 1
+        self.redo_moves = []
+        
+        # Check for win
+        if self.check_win(row, col, self.current_player):
+            self._finish_game(self.current_player)
+            return True
+        
+        # Check for draw
+        if self.is_board_full():
+            self._finish_game(0)  # Draw
+            return True
         
-        return False  # Column is full
+        self.switch_player()
+        return True
+    
+    def _finish_game(self, winner: int) -> None:
+        """End the game, counting its result once even if it is undone and replayed."""
+        self.game_state = 'finished'
+        self.winner = winner
+        self.game_end_time = time.time()
+        if not self.stats_recorded:
+            self.stats_recorded = True
+            self.update_stats()
     
     def check_win(self, row: int, col: int, player: int) -> bool:
         """Check if the current move results in a win."""
-        directions = [
-            (0, 1),   # horizontal
-            (1, 0),   # vertical
-            (1, 1),   # diagonal \
-            (1, -1)   # diagonal /
-        ]
-        
-        for dr, dc in directions:
-            count = 1  # Count the current piece
-            
-            # Check in positive direction
-            for i in range(1, 4):
-                new_row, new_col = row + dr * i, col + dc * i
-                if (0 <= new_row < self.ROWS and 0 <= new_col < self.COLS and 
-                    self.board[new_row][new_col] == player):
-                    count += 1
-                else:
-                    break
-            
-            # Check in negative direction
-            for i in range(1, 4):
-                new_row, new_col = row - dr * i, col - dc * i
-                if (0 <= new_row < self.ROWS and 0 <= new_col < self.COLS and 
-                    self.board[new_row][new_col] == player):
-                    count += 1
-                else:
-                    break
-            
-            if count >= 4:
+        lines = self.position.lines
+        bits = self.position.boards[player - 1] | (1 << lines.cell_bit(row, col))
+        for index in lines.cell_lines[row][col]:
+            mask = lines.masks[index]
+            if bits & mask == mask:
                 return True
-        
         return False
     
     def is_board_full(self) -> bool:
         """Check if the board is full."""
-        return all(self.board[0][col] != 0 for col in range(self.COLS))
+        return self.position.moves == self.ROWS * self.COLS
     
     def switch_player(self) -> None:
         """Switch to the other player."""
         self.current_player = 2 if self.current_player == 1 else 1
     
     def undo_move(self) -> bool:
-        """Undo the last move."""
-        if not self.move_history or self.game_state != 'playing':
+        """Undo the last move, reopening the game if it had ended."""
+        if not self.move_history or self.game_state not in ('playing', 'finished'):
             return False
         
         last_move = self.move_history.pop()
+        self.position.undo()
         self.board[last_move['row']][last_move['col']] = 0
         self.move_count -= 1
-        self.switch_player()
+        self.current_player = last_move['player']
+        self.redo_moves.append(last_move['col'])
+        if self.game_state == 'finished':
+            self.game_state = 'playing'
+            self.winner = None
+            self.game_end_time = None
         return True
     
-    def get_ai_move(self) -> int:
-        """Get AI move based on difficulty setting."""
+    def redo_move(self) -> bool:
+        """Replay the last undone move."""
+        if not self.redo_moves or self.game_state != 'playing':
+            return False
+        redo_moves = self.redo_moves
+        col = redo_moves.pop()
+        self.drop_piece(col)
+        self.redo_moves = redo_moves
+        return True
+    
+    def snapshot(self) -> GameState:
+        """Get an immutable snapshot of the board, moves and result."""
+        winner = self.winner if self.game_state == 'finished' else None
+        return GameState.from_position(self.position, winner)
+    
+    def restore(self, state: GameState) -> None:
+        """Put the game in a snapshot's state; the redo moves are dropped."""
+        if (state.rows, state.cols) != (self.ROWS, self.COLS):
+            raise ValueError(f"Cannot restore a {state.rows}x{state.cols} state "
+                             f"into a {self.ROWS}x{self.COLS} game")
+        self.stop_pondering()
+        self.position = state.to_position()
+        self.board = state.to_board()
+        
+        heights = [0] * self.COLS
+        self.move_history = []
+        for ply, col in enumerate(state.moves):
+            self.move_history.append({'row': self.ROWS - 1 - heights[col], 'col': col,
+                                      'player': 1 + (ply & 1), 'timestamp': None})
+            heights[col] += 1
+        self.move_count = len(state.moves)
+        self.redo_moves = []
+        
+        if self.game_start_time is None:
+            self.game_start_time = time.time()
+        if state.finished:
+            self.game_state = 'finished'
+            self.winner = state.winner
+            self.current_player = self.move_history[-1]['player'] if state.moves else 1
+            self.game_end_time = self.game_end_time or time.time()
+        else:
+            self.game_state = 'playing'
+            self.winner = None
+            self.current_player = state.current_player
+            self.game_end_time = None
+        # A finished snapshot was counted when it was played; an unfinished one
+        # is a game whose result has yet to be counted
+        self.stats_recorded = state.finished
+    
+    def copy(self) -> 'ConnectFourGame':
+        """Get an independent game in the same state for what-if play, without persistence."""
+        clone = ConnectFourGame()
+        clone.settings = dict(self.settings)
+        clone.game_start_time = self.game_start_time
+        clone.game_end_time = self.game_end_time
+        clone.restore(self.snapshot())
+        clone.redo_moves = list(self.redo_moves)
+        return clone
+    
+    def get_ai_move(self, position: Optional[Position] = None) -> int:
+        """Get AI move based on difficulty setting.
+        
+        Pass a copy of the current position to search it instead of the live
+        one, e.g. from a background thread while the board may change.
+        """
         if self.game_state != 'playing' or self.current_player != 2:
             return -1
         
-        difficulty = self.settings['ai_difficulty']
+        return self.choose_move(position)
+    
+    def choose_move(self, position: Optional[Position] = None,
+                    difficulty: Optional[str] = None) -> int:
+        """Pick a move for whichever side is to move, e.g. for engine-vs-engine play."""
+        if position is None:
+            position = self.position
+        if difficulty is None:
+            difficulty = self.settings['ai_difficulty']
+        self.stop_pondering()
         
+        stats = self.search_stats
+        if stats is None:
+            return self._dispatch_move(position, difficulty)
+        
+        stats.begin(self.transposition_table)
+        try:
+            return self._dispatch_move(position, difficulty)
+        finally:
+            stats.end(self.transposition_table)
+            if self.search_stats_callback is not None:
+                self.search_stats_callback(stats.get_report())
+    
+    def _dispatch_move(self, position: Position, difficulty: str) -> int:
+        """Get the move of the given difficulty's AI."""
         if difficulty == 'easy':
-            return self._get_random_move()
+            return self._get_random_move(position)
         elif difficulty == 'medium':
-            return self._get_medium_ai_move()
+            return self._get_medium_ai_move(position)
+        elif difficulty == 'mcts':
+            return self._get_mcts_ai_move(position)
         else:  # hard
-            return self._get_hard_ai_move()
+            return self._get_hard_ai_move(position)
+    
+    def _engines(self) -> List[Any]:
+        """List the search engines created so far."""
+        return [engine for engine in (self._searcher, self.solver, self.parallel_search,
+                                      self.mcts, self.parallel_mcts)
+                if engine is not None]
+    
+    def cancel_ai_move(self) -> None:
+        """Ask the running AI search, or the next one if it has not started yet,
+        to stop as soon as possible."""
+        self._ai_cancelled = True
+        for engine in self._engines():
+            engine.cancel()
     
-    def _get_random_move(self) -> int:
+    def clear_ai_cancel(self) -> None:
+        """Forget earlier cancels so the next AI search runs.
+        
+        Call it when scheduling a search, before handing it to another
+        thread, so a cancel that comes before the search starts still counts.
+        """
+        self._ai_cancelled = False
+        for engine in self._engines():
+            engine.clear_cancel()
+    
+    def _new_engine(self, engine: Any) -> Any:
+        """Pass a pending cancel on to an engine created after it."""
+        if self._ai_cancelled:
+            engine.cancel()
+        return engine
+    
+    def enable_search_stats(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None
+                            ) -> 'SearchStats':
+        """Record nodes, cutoffs, table use and phase timings of every AI move.
+        
+        The returned stats object holds the last move's counters; the optional
+        callback also receives them as a dict after each move.
+        """
+        if self.search_stats is None:
+            from instrumentation import InstrumentedSearch, SearchStats
+            self.stop_pondering()
+            self.search_stats = SearchStats()
+            self.searcher = InstrumentedSearch(self.transposition_table, self.search_stats)
+        self.search_stats_callback = callback
+        return self.search_stats
+    
+    def disable_search_stats(self) -> None:
+        """Go back to the uninstrumented search."""
+        if self.search_stats is not None:
+            self.stop_pondering()
+            self.search_stats = None
+            self.search_stats_callback = None
+            self.searcher = AlphaBetaSearch(self.transposition_table)
+    
+    def profile_ai_move(self, path: Optional[str] = None,
+                        position: Optional[Position] = None) -> int:
+        """Pick a move under cProfile, writing the profile to ``path`` if given."""
+        from instrumentation import profile_call
+        column, profile = profile_call(self.choose_move, position, path=path)
+        self.last_profile = profile
+        return column
+    
+    def _phase(self, name: str):
+        """Time a block as a phase of the move when instrumentation is on."""
+        if self.search_stats is None:
+            return nullcontext()
+        return self.search_stats.phase(name)
+    
+    def _get_random_move(self, position: Position) -> int:
         """Get a random valid move."""
-        available_moves = [col for col in range(self.COLS) if self.board[0][col] == 0]
+        available_moves = position.playable_columns()
         return random.choice(available_moves) if available_moves else -1
     
-    def _get_medium_ai_move(self) -> int:
+    def _get_medium_ai_move(self, position: Position) -> int:
         """Get a medium difficulty AI move."""
-        # Check for immediate win
-        for col in range(self.COLS):
-            if self.board[0][col] == 0:
-                row = self._get_lowest_row(col)
-                self.board[row][col] = 2
-                if self.check_win(row, col, 2):
-                    self.board[row][col] = 0
-                    return col
-                self.board[row][col] = 0
-        
-        # Check for immediate loss (block player)
-        for col in range(self.COLS):
-            if self.board[0][col] == 0:
-                row = self._get_lowest_row(col)
-                self.board[row][col] = 1
-                if self.check_win(row, col, 1):
-                    self.board[row][col] = 0
+        available_moves = position.playable_columns()
+        
+        # Check for immediate win, then for immediate loss (block player)
+        player = position.current_player
+        opponent = 2 if player == 1 else 1
+        for side in (player, opponent):
+            for col in available_moves:
+                if position.is_winning_move(col, side):
                     return col
-                self.board[row][col] = 0
         
         # Prefer center columns
         center_cols = [3, 2, 4, 1, 5, 0, 6]
         for col in center_cols:
-            if self.board[0][col] == 0:
+            if position.can_play(col):
                 return col
         
-        return self._get_random_move()
+        return self._get_random_move(position)
     
-    def _get_hard_ai_move(self) -> int:
+    def _get_hard_ai_move(self, position: Position) -> int:
         """Get a hard difficulty AI move using minimax."""
-        best_move = self._minimax(4, -float('inf'), float('inf'), True)
-        return best_move['column']
+        pondered = self.ponder_results.pop(position.key(), None)
+        if pondered is not None and pondered[0] == self._ponder_signature():
+            column = pondered[1]['column']
+            if position.can_play(column):
+                self.last_search = dict(pondered[1], pondered=True)
+                return column
+        
+        self.last_search = self._search_hard_move(position)
+        return self.last_search['column']
+    
+    def _search_hard_move(self, position: Position) -> Dict[str, Any]:
+        """Search a hard AI move: book, solver, then alpha-beta as configured."""
+        with self._phase('book'):
+            book_col = self._get_book_move(position)
+        if book_col != -1:
+            return {'column': book_col, 'depth': 0, 'completed': True, 'book': True}
+        
+        threshold = self.settings['solver_threshold']
+        empty_cells = self.ROWS * self.COLS - position.moves
+        if threshold and empty_cells <= threshold:
+            if self.solver is None:
+                self.solver = self._new_engine(Solver())
+            with self._phase('solver'):
+                result = self.solver.analyze(position)
+            if self.search_stats is not None:
+                self.search_stats.solver_nodes = result['nodes']
+            return {'column': result['column'], 'score': result['score'],
+                    'depth': result['distance'], 'completed': True,
+                    'value': result['value'], 'nodes': result['nodes']}
+        
+        time_ms = self.settings['search_time_ms']
+        node_budget = self.settings['search_node_budget']
+        if time_ms is not None or node_budget is not None:
+            with self._phase('search'):
+                return self.searcher.iterative_deepening(
+                    position, time_ms=time_ms, node_budget=node_budget)
+        
+        workers = self.settings['search_workers']
+        if workers and workers > 1:
+            if self.parallel_search is None or self.parallel_search.workers != workers:
+                if self.parallel_search is not None:
+                    self.parallel_search.close()
+                from parallel_search import ParallelRootSearch
+                self.parallel_search = self._new_engine(ParallelRootSearch(workers))
+            with self._phase('parallel_search'):
+                # Break ties like the serial search, which tries its table move first
+                result = self.parallel_search.search(position, self.settings['search_depth'],
+                                                     self.searcher.table_move(position))
+            result['completed'] = True
+            return result
+        
+        depth = self.settings['search_depth']
+        with self._phase('search'):
+            score, column = self.searcher.search(position, depth)
+        return {'column': column, 'score': score, 'depth': depth, 'completed': True}
+    
+    def _ponder_signature(self) -> Tuple:
+        """Get the settings a pondered answer depends on."""
+        return tuple(self.settings[key] for key in (
+            'ai_difficulty', 'search_depth', 'search_time_ms', 'search_node_budget',
+            'search_workers', 'solver_threshold', 'opening_book'))
+    
+    def start_pondering(self, position: Optional[Position] = None) -> bool:
+        """Search the player's likely replies in the background after an AI move.
+        
+        The answers found are played at once if the player makes one of
+        those replies, and the search fills the transposition table for the
+        others.  Returns whether pondering started.
+        """
+        self.stop_pondering()
+        self.ponder_results = {}
+        workers = self.settings['search_workers']
+        if (not self.settings['pondering'] or self.settings['ai_difficulty'] != 'hard'
+                or (workers and workers > 1)):
+            return False
+        
+        position = (position if position is not None else self.position).copy()
+        replies = [col for col in self._ponder_replies(position)
+                   if not position.is_winning_move(col, position.current_player)]
+        if position.moves + 1 >= self.ROWS * self.COLS or not replies:
+            return False
+        
+        self.clear_ai_cancel()
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, args=(position, replies, self._ponder_signature(), self._ponder_stop),
+            daemon=True)
+        self._ponder_thread.start()
+        return True
+    
+    def stop_pondering(self) -> None:
+        """Stop pondering and wait for the background search to let go of the table.
+        
+        The search and the solver both stop at their next check, so this
+        returns within milliseconds even in the middle of a long solve, and
+        are free to search again afterwards.
+        """
+        thread = self._ponder_thread
+        if thread is None:
+            return
+        self._ponder_stop.set()
+        while thread.is_alive():
+            self.searcher.cancel()
+            if self.solver is not None:
+                self.solver.cancel()
+            thread.join(0.01)
+        self._ponder_thread = None
+        self.clear_ai_cancel()
+    
+    def is_pondering(self) -> bool:
+        """Check whether the background search is still running."""
+        return self._ponder_thread is not None and self._ponder_thread.is_alive()
+    
+    def _ponder_replies(self, position: Position) -> List[int]:
+        """Order the player's replies with the one the last search expects first."""
+        center = (self.COLS - 1) / 2
+        replies = sorted(position.playable_columns(), key=lambda col: abs(col - center))
+        key, mirrored = position.canonical_key()
+        entry = self.transposition_table.probe(key)
+        if entry is not None and entry[3] != -1:
+            expected = position.mirror_column(entry[3]) if mirrored else entry[3]
+            if expected in replies:
+                replies.remove(expected)
+                replies.insert(0, expected)
+        return replies
+    
+    def _ponder(self, position: Position, replies: List[int], signature: Tuple,
+                stop: threading.Event) -> None:
+        """Find the AI's answer to each reply in turn (pondering thread)."""
+        for col in replies:
+            if stop.is_set():
+                return
+            position.play(col)
+            key = position.key()
+            try:
+                result = self._search_hard_move(position)
+            except SearchTimeout:
+                return
+            finally:
+                position.undo()
+            if stop.is_set() or not result.get('completed', True):
+                return
+            self.ponder_results[key] = (signature, result)
+    
+    def _get_mcts_ai_move(self, position: Position) -> int:
+        """Get an MCTS AI move, reusing the tree grown on earlier moves."""
+        iterations = self.settings['mcts_iterations']
+        time_ms = self.settings['mcts_time_ms']
+        exploration = self.settings['mcts_exploration']
+        workers = self.settings['mcts_workers']
+        if workers and workers > 1:
+            if (self.parallel_mcts is None or self.parallel_mcts.workers != workers
+                    or self.parallel_mcts.exploration != exploration):
+                if self.parallel_mcts is not None:
+                    self.parallel_mcts.close()
+                from mcts import ParallelMCTS
+                self.parallel_mcts = self._new_engine(ParallelMCTS(workers, exploration))
+            with self._phase('mcts'):
+                self.last_search = self.parallel_mcts.search(position, iterations, time_ms)
+        else:
+            if self.mcts is None:
+                from mcts import MCTS
+                self.mcts = self._new_engine(MCTS(exploration))
+            self.mcts.exploration = exploration
+            with self._phase('mcts'):
+                self.last_search = self.mcts.search(position, iterations, time_ms)
+        self.last_search['completed'] = True
+        return self.last_search['column']
+    
+    def _get_book_move(self, position: Position) -> int:
+        """Get the opening book move for a position, or -1."""
+        path = self.settings['opening_book']
+        if not path or path == self._failed_book:
+            return -1
+        if self.opening_book is None or self.opening_book.path != path:
+            from opening_book import OpeningBook
+            try:
+                self.opening_book = OpeningBook(path)
+            except (OSError, ValueError):
+                # Do not read the file again on every move; a new path is tried
+                self._failed_book = path
+                return -1
+        col = self.opening_book.lookup(position)
+        return col if position.can_play(col) else -1
     
     def _minimax(self, depth: int, alpha: float, beta: float, maximizing: bool) -> Dict[str, Any]:
         """Minimax algorithm with alpha-beta pruning."""
-        if depth == 0:
-            return {'score': self._evaluate_board(), 'column': -1}
-        
-        available_moves = self._get_available_moves()
-        if not available_moves:
-            return {'score': 0, 'column': -1}
-        
-        # Check for immediate win/loss
-        for col in available_moves:
-            row = self._get_lowest_row(col)
-            self.board[row][col] = 2 if maximizing else 1
-            
-            if self.check_win(row, col, 2 if maximizing else 1):
-                self.board[row][col] = 0
-                return {
-                    'score': 1000000 if maximizing else -1000000,
-                    'column': col
-                }
-            self.board[row][col] = 0
-        
+        # The bitboard search scores from the side to move; convert back to
+        # the AI's (player 2's) point of view.
         if maximizing:
-            max_eval = -float('inf')
-            best_column = available_moves[0]
-            
-            for col in available_moves:
-                row = self._get_lowest_row(col)
-                self.board[row][col] = 2
-                eval_result = self._minimax(depth - 1, alpha, beta, False)
-                self.board[row][col] = 0
-                
-                if eval_result['score'] > max_eval:
-                    max_eval = eval_result['score']
-                    best_column = col
-                
-                alpha = max(alpha, eval_result['score'])
-                if beta <= alpha:
-                    break
-            
-            return {'score': max_eval, 'column': best_column}
+            score, column = self.searcher.search(self.position, depth, alpha, beta)
         else:
-            min_eval = float('inf')
-            best_column = available_moves[0]
-            
-            for col in available_moves:
-                row = self._get_lowest_row(col)
-                self.board[row][col] = 1
-                eval_result = self._minimax(depth - 1, alpha, beta, True)
-                self.board[row][col] = 0
-                
-                if eval_result['score'] < min_eval:
-                    min_eval = eval_result['score']
-                    best_column = col
-                
-                beta = min(beta, eval_result['score'])
-                if beta <= alpha:
-                    break
-            
-            return {'score': min_eval, 'column': best_column}
+            score, column = self.searcher.search(self.position, depth, -beta, -alpha)
+            score = -score
+        return {'score': score, 'column': column}
     
     def _evaluate_board(self) -> int:
         """Evaluate the current board state."""
-        score = 0
-        
-        # Evaluate all possible 4-piece sequences
-        for row in range(self.ROWS):
-            for col in range(self.COLS):
-                score += self._evaluate_position(row, col)
-        
-        return score
+        return self.position.evaluate()
     
     def _evaluate_position(self, row: int, col: int) -> int:
         """Evaluate a specific position on the board."""
+        lines = self.position.lines
         score = 0
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        for dr, dc in directions:
-            sequence = []
-            for i in range(4):
-                new_row, new_col = row + dr * i, col + dc * i
-                if 0 <= new_row < self.ROWS and 0 <= new_col < self.COLS:
-                    sequence.append(self.board[new_row][new_col])
-                else:
-                    sequence.append(-1)  # Invalid position
-            
+        
+        # Only lines that start here and stay on the board can score
+        for index in lines.lines_from[row][col]:
+            sequence = [self.board[r][c] for r, c in lines.lines[index]]
             score += self._evaluate_sequence(sequence)
         
         return score
@@ -333,14 +655,13 @@ class ConnectFourGame:
     
     def _get_available_moves(self) -> List[int]:
         """Get list of available moves."""
-        return [col for col in range(self.COLS) if self.board[0][col] == 0]
+        return self.position.playable_columns()
     
     def _get_lowest_row(self, col: int) -> int:
         """Get the lowest available row in a column."""
-        for row in range(self.ROWS - 1, -1, -1):
-            if self.board[row][col] == 0:
-                return row
-        return -1
+        if not self.position.can_play(col):
+            return -1
+        return self.ROWS - 1 - self.position.heights[col]
     
     def get_game_time(self) -> float:
         """Get current game time in seconds."""
@@ -355,24 +676,25 @@ class ConnectFourGame:
         secs = int(seconds % 60)
         return f"{minutes:02d}:{secs:02d}"
     
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get the game statistics, totalled from the stats log on demand."""
+        if self.stats_log is None:
+            return dict(self.session_stats)
+        return dict(self.stats_log.get_stats())
+    
     def update_stats(self) -> None:
         """Update game statistics."""
-        self.stats['games_played'] += 1
-        self.stats['total_moves'] += self.move_count
-        
-        if self.winner == 1:
-            self.stats['player1_wins'] += 1
-            self.stats['win_streak'] += 1
-            self.stats['longest_streak'] = max(self.stats['longest_streak'], self.stats['win_streak'])
-        elif self.winner == 2:
-            self.stats['player2_wins'] += 1
-            self.stats['win_streak'] = 0
-        
-        game_time = self.get_game_time()
-        if not self.stats['best_time'] or game_time < self.stats['best_time']:
-            self.stats['best_time'] = game_time
-        
-        self.save_stats()
+        record = {
+            'winner': self.winner,
+            'moves': self.move_count,
+            'time': self.get_game_time(),
+            'ended': self.game_end_time,
+        }
+        if self.stats_log is None:
+            fold_game(self.session_stats, record)
+        else:
+            self.stats_log.record(record)
     
     def load_settings(self) -> None:
         """Load settings from file."""
@@ -393,22 +715,14 @@ class ConnectFourGame:
             pass
     
     def load_stats(self) -> None:
-        """Load statistics from file."""
-        try:
-            if os.path.exists('stats.json'):
-                with open('stats.json', 'r') as f:
-                    saved_stats = json.load(f)
-                    self.stats.update(saved_stats)
-        except Exception:
-            pass
+        """Open the statistics log; totals are read when first needed."""
+        self.stats_log = StatsLog(buffer_size=self.settings['stats_buffer_size'],
+                                  compact_every=self.settings['stats_compact_every'])
     
     def save_stats(self) -> None:
-        """Save statistics to file."""
-        try:
-            with open('stats.json', 'w') as f:
-                json.dump(self.stats, f, indent=2)
-        except Exception:
-            pass
+        """Write any buffered games and fold the log into stats.json."""
+        if self.stats_log is not None:
+            self.stats_log.compact()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Incremental Evaluation
+Keeps the piece counts of every four-cell window up to date as moves are
+played and undone, so the static evaluation never rescans the board.
+"""
+
+from typing import List
+
+from bitboard import Position, WINDOW_SCORES
+
+# A window's counts are packed into one code: ai_count * 5 + player_count.
+AI_STEP = 5
+PLAYER_STEP = 1
+
+
+def _window_score(ai_count: int, player_count: int) -> int:
+    """Score of one window, matching ConnectFourGame._evaluate_sequence."""
+    if player_count == 0:
+        return WINDOW_SCORES[ai_count]
+    if ai_count == 0:
+        return -WINDOW_SCORES[player_count]
+    return 0
+
+
+def _build_deltas(step: int) -> List[int]:
+    """Score change of adding one piece to a window, indexed by window code."""
+    deltas = [0] * 25
+    for ai_count in range(5):
+        for player_count in range(5):
+            if ai_count + player_count >= 4:
+                continue
+            code = ai_count * AI_STEP + player_count
+            new_code = code + step
+            deltas[code] = (_window_score(new_code // AI_STEP, new_code % AI_STEP)
+                            - _window_score(ai_count, player_count))
+    return deltas
+
+
+AI_DELTAS = _build_deltas(AI_STEP)
+PLAYER_DELTAS = _build_deltas(PLAYER_STEP)
+
+
+class IncrementalEvaluator:
+    """Position wrapper that updates the evaluation on every play and undo."""
+
+    def __init__(self, position: Position):
+        self.position = position
+        self.stride = position.stride
+
+        # Windows containing each cell, by bitboard bit index
+        self.cell_windows = position.lines.bit_lines
+
+        self.sync()
+
+    def sync(self) -> None:
+        """Recount every window from the wrapped position."""
+        position = self.position
+        ai_pieces, player_pieces = position.boards[1], position.boards[0]
+        self.codes = []
+        self.score = 0
+        for window in position.windows:
+            ai_count = bin(window & ai_pieces).count('1')
+            player_count = bin(window & player_pieces).count('1')
+            self.codes.append(ai_count * AI_STEP + player_count)
+            self.score += _window_score(ai_count, player_count)
+        self._scores: List[int] = []
+
+    def play(self, col: int) -> int:
+        """Play a move on the wrapped position and update the window counts."""
+        position = self.position
+        cell = col * self.stride + position.heights[col]
+        if position.moves & 1:
+            step, deltas = AI_STEP, AI_DELTAS
+        else:
+            step, deltas = PLAYER_STEP, PLAYER_DELTAS
+
+        codes = self.codes
+        score = self.score
+        self._scores.append(score)
+        for window in self.cell_windows[cell]:
+            code = codes[window]
+            score += deltas[code]
+            codes[window] = code + step
+        self.score = score
+        return position.play(col)
+
+    def undo(self) -> int:
+        """Undo the last move on the wrapped position and restore the counts."""
+        position = self.position
+        col = position.undo()
+        cell = col * self.stride + position.heights[col]
+        step = AI_STEP if position.moves & 1 else PLAYER_STEP
+
+        codes = self.codes
+        for window in self.cell_windows[cell]:
+            codes[window] -= step
+        self.score = self._scores.pop()
+        return col
+
+    def evaluate(self) -> int:
+        """Static evaluation from player 2's point of view."""
+        return self.score
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Game Records
+Compact binary archive of finished (or abandoned) games.
+
+A record file is a small header followed by one frame per game: a varint
+byte length, then a result byte and the columns played, two per byte in
+nibbles (low nibble first, 0xF pads an odd move count).  A full 6x7 game
+takes 23 bytes.  Files are read and written as streams, one frame at a
+time, so archives of millions of games never have to fit in memory.
+
+An optional index file next to the archive (``<path>.idx``) holds the byte
+offset of every frame, so a reader can jump straight to game ``n``.
+
+Usage:
+    python game_records.py info games.c4r
+    python game_records.py index games.c4r
+    python game_records.py show games.c4r 42
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from connect_four_game import ConnectFourGame
+
+MAGIC = b'C4GR'
+VERSION = 1
+HEADER = struct.Struct('<4sHBBxx')  # magic, version, rows, cols
+
+INDEX_MAGIC = b'C4GI'
+INDEX_HEADER = struct.Struct('<4sHxxQ')  # magic, version, record count
+OFFSET = struct.Struct('<Q')  # byte offset of a frame in the record file
+
+# Result byte of a frame, from ConnectFourGame.winner (None while unfinished)
+RESULT_CODES = {None: 0, 1: 1, 2: 2, 0: 3}
+RESULTS = {code: winner for winner, code in RESULT_CODES.items()}
+
+PAD = 0xF  # nibble filling the last byte of an odd move count
+CHUNK_SIZE = 64 * 1024
+
+# Columns held by each byte, with the padding nibble dropped
+_NIBBLES = [(byte & 0xF,) if byte >> 4 == PAD else (byte & 0xF, byte >> 4)
+            for byte in range(256)]
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode a non-negative integer as a little-endian base-128 varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data: bytes, offset: int = 0) -> Optional[Tuple[int, int]]:
+    """Decode a varint at ``offset``: (value, next offset), or None if it is cut off."""
+    value = shift = 0
+    while offset < len(data):
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+    return None
+
+
+def encode_record(moves: List[int], winner: Optional[int] = None) -> bytes:
+    """Pack a game into a frame payload: result byte plus nibble-packed columns."""
+    padded = list(moves) + [PAD] if len(moves) % 2 else moves
+    packed = bytes(padded[i] | (padded[i + 1] << 4) for i in range(0, len(padded), 2))
+    return bytes((RESULT_CODES[winner],)) + packed
+
+
+def decode_record(payload: bytes) -> Dict[str, Any]:
+    """Unpack a frame payload into {'moves': columns, 'winner': 1, 2, 0 or None}."""
+    try:
+        winner = RESULTS[payload[0]]
+    except (IndexError, KeyError):
+        raise ValueError("Corrupt game record") from None
+    moves: List[int] = []
+    for byte in payload[1:]:
+        moves.extend(_NIBBLES[byte])
+    return {'moves': moves, 'winner': winner}
+
+
+def record_game(game: ConnectFourGame) -> Dict[str, Any]:
+    """Get the record of a game: its columns and its winner once finished."""
+    return {'moves': [move['col'] for move in game.move_history],
+            'winner': game.winner if game.game_state == 'finished' else None}
+
+
+def replay(record: Dict[str, Any], game: Optional[ConnectFourGame] = None) -> ConnectFourGame:
+    """Play a record's moves into a new game, or into ``game`` after restarting it."""
+    if game is None:
+        game = ConnectFourGame()
+    game.start_game()
+    for col in record['moves']:
+        if not game.drop_piece(col):
+            raise ValueError(f"Illegal move {col} after {game.move_count} moves")
+    return game
+
+
+class GameRecordWriter:
+    """Streaming writer appending one frame per game to a record file."""
+
+    def __init__(self, path: str, rows: int = 6, cols: int = 7, append: bool = False,
+                 index: bool = False):
+        if cols > PAD:
+            raise ValueError(f"Columns must fit a nibble; {cols} columns is too many")
+        self.path = path
+        self.rows = rows
+        self.cols = cols
+        self.index = index
+        self.count = 0
+
+        if append and os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                file_rows, file_cols = _read_header(f, path)
+            if (file_rows, file_cols) != (rows, cols):
+                raise ValueError(f"{path} holds {file_rows}x{file_cols} games, not {rows}x{cols}")
+            self._offsets = list(scan_offsets(path)) if index else []
+            self._file = open(path, 'ab')
+        else:
+            self._offsets = []
+            self._file = open(path, 'wb')
+            self._file.write(HEADER.pack(MAGIC, VERSION, rows, cols))
+        self._position = self._file.tell()
+        if not index and os.path.exists(index_path(path)):
+            os.remove(index_path(path))  # it would miss the games written now
+
+    def write(self, moves: List[int], winner: Optional[int] = None) -> None:
+        """Append one game given as its columns and winner."""
+        if len(moves) > self.rows * self.cols:
+            raise ValueError(f"{len(moves)} moves do not fit a {self.rows}x{self.cols} board")
+        if any(not 0 <= col < self.cols for col in moves):
+            raise ValueError(f"Column out of range in {moves}")
+        payload = encode_record(moves, winner)
+        frame = encode_varint(len(payload)) + payload
+        if self.index:
+            self._offsets.append(self._position)
+        self._file.write(frame)
+        self._position += len(frame)
+        self.count += 1
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        """Append one game given as a record dict."""
+        self.write(record['moves'], record.get('winner'))
+
+    def write_game(self, game: ConnectFourGame) -> None:
+        """Append the moves and result of a game."""
+        self.write_record(record_game(game))
+
+    def close(self) -> None:
+        """Flush the record file and write its index if one was asked for."""
+        if self._file.closed:
+            return
+        self._file.close()
+        if self.index:
+            write_index(self.path, self._offsets)
+
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def write_records(path: str, records: Iterable[Dict[str, Any]], rows: int = 6, cols: int = 7,
+                  append: bool = False, index: bool = False) -> int:
+    """Write records from any iterable, consuming it lazily; returns the count written."""
+    with GameRecordWriter(path, rows, cols, append=append, index=index) as writer:
+        for record in records:
+            writer.write_record(record)
+    return writer.count
+
+
+def _read_header(f, path: str) -> Tuple[int, int]:
+    """Check a record file's header and return its (rows, cols)."""
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"Not a game record file: {path}")
+    magic, version, rows, cols = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a game record file: {path}")
+    return rows, cols
+
+
+def read_geometry(path: str) -> Tuple[int, int]:
+    """Get the (rows, cols) of the games in a record file."""
+    with open(path, 'rb') as f:
+        return _read_header(f, path)
+
+
+def _iter_frames(f, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, payload) for every frame from the file's current position."""
+    buffer = b''
+    start = 0
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            if start < len(buffer):
+                raise ValueError(f"Truncated game record at byte {offset}")
+            return
+        buffer = buffer[start:] + chunk
+        start = 0
+        while True:
+            parsed = decode_varint(buffer, start)
+            if parsed is None:
+                break
+            length, payload_start = parsed
+            end = payload_start + length
+            if end > len(buffer):
+                break
+            yield offset, buffer[payload_start:end]
+            offset += end - start
+            start = end
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the records of a file in order, one chunk of the file in memory at a time."""
+    with open(path, 'rb') as f:
+        _read_header(f, path)
+        for _, payload in _iter_frames(f, HEADER.size):
+            yield decode_record(payload)
+
+
+def scan_offsets(path: str) -> Iterator[int]:
+    """Stream the byte offset of every frame of a record file."""
+    with open(path, 'rb') as f:
+        _read_header(f, path)
+        for offset, _ in _iter_frames(f, HEADER.size):
+            yield offset
+
+
+def replay_games(path: str, game: Optional[ConnectFourGame] = None) -> Iterator[ConnectFourGame]:
+    """Replay every record of a file, yielding one game object reused for each."""
+    if game is None:
+        game = ConnectFourGame()
+    for record in read_records(path):
+        yield replay(record, game)
+
+
+def index_path(path: str) -> str:
+    """Get the index file path of a record file."""
+    return path + '.idx'
+
+
+def write_index(path: str, offsets: List[int]) -> None:
+    """Write the index of a record file, replacing any old one atomically."""
+    temp_path = index_path(path) + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, VERSION, len(offsets)))
+        for offset in offsets:
+            f.write(OFFSET.pack(offset))
+    os.replace(temp_path, index_path(path))
+
+
+def build_index(path: str) -> int:
+    """Scan a record file and write its index; returns the record count."""
+    offsets = list(scan_offsets(path))
+    write_index(path, offsets)
+    return len(offsets)
+
+
+class GameRecordReader:
+    """Random access to the records of an indexed file, memory-mapped like a book."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.rows, self.cols = _read_header(f, path)
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            with open(index_path(path), 'rb') as f:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._data.close()
+            raise ValueError(f"No index for {path}; build one with build_index()") from None
+
+        magic, version, self.count = INDEX_HEADER.unpack_from(self._index, 0)
+        if (magic != INDEX_MAGIC or version != VERSION
+                or len(self._index) < INDEX_HEADER.size + self.count * OFFSET.size):
+            self.close()
+            raise ValueError(f"Bad index file: {index_path(path)}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, number: int) -> Dict[str, Any]:
+        """Get record ``number``, reading only its frame."""
+        if number < 0:
+            number += self.count
+        if not 0 <= number < self.count:
+            raise IndexError(f"Record {number} out of range")
+        offset, = OFFSET.unpack_from(self._index, INDEX_HEADER.size + number * OFFSET.size)
+        parsed = decode_varint(self._data, offset)
+        if parsed is None or parsed[0] + parsed[1] > len(self._data):
+            raise ValueError(f"Truncated game record at byte {offset}")
+        length, start = parsed
+        return decode_record(self._data[start:start + length])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for number in range(self.count):
+            yield self[number]
+
+    def close(self) -> None:
+        """Unmap the record and index files."""
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> 'GameRecordReader':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def summarize(path: str) -> Dict[str, Any]:
+    """Count the games, results and moves of a record file in one streaming pass."""
+    games = moves = 0
+    results = {'first_wins': 0, 'second_wins': 0, 'draws': 0, 'unfinished': 0}
+    names = {1: 'first_wins', 2: 'second_wins', 0: 'draws', None: 'unfinished'}
+    for record in read_records(path):
+        games += 1
+        moves += len(record['moves'])
+        results[names[record['winner']]] += 1
+    size = os.path.getsize(path)
+    return dict(results, games=games, moves=moves, bytes=size,
+                mean_length=moves / games if games else 0.0,
+                bytes_per_game=(size - HEADER.size) / games if games else 0.0)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Inspect Connect Four game record files.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    info = commands.add_parser('info', help="count the games and results of a file")
+    info.add_argument('path')
+
+    index = commands.add_parser('index', help="write the random-access index of a file")
+    index.add_argument('path')
+
+    show = commands.add_parser('show', help="print one game as 1-based columns")
+    show.add_argument('path')
+    show.add_argument('number', type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == 'info':
+        summary = summarize(args.path)
+        print(f"{summary['games']} games, {summary['moves']} moves "
+              f"({summary['mean_length']:.1f} per game, {summary['bytes_per_game']:.1f} bytes per game)")
+        print(f"first {summary['first_wins']}, second {summary['second_wins']}, "
+              f"draws {summary['draws']}, unfinished {summary['unfinished']}")
+        return 0
+
+    if args.command == 'index':
+        count = build_index(args.path)
+        print(f"Indexed {count} games in {index_path(args.path)}")
+        return 0
+
+    if not os.path.exists(index_path(args.path)):
+        build_index(args.path)
+    with GameRecordReader(args.path) as reader:
+        record = reader[args.number]
+    result = {1: "first player wins", 2: "second player wins", 0: "draw", None: "unfinished"}
+    print(''.join(str(col + 1) for col in record['moves']), result[record['winner']])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Game State
+Immutable snapshot of a game: the two bitboards, the column heights and
+the columns played.
+
+A snapshot is a few small tuples, never the nested board lists, so taking
+one or restoring a game from it costs the same whatever was played, and
+snapshots can be kept freely for undo, search or what-if exploration.
+"""
+
+from typing import List, Optional, Tuple
+
+from bitboard import Position, has_four
+
+
+class GameState:
+    """Read-only game snapshot with the winner (0 for a draw) once decided."""
+
+    __slots__ = ('rows', 'cols', 'boards', 'heights', 'moves', 'winner')
+
+    def __init__(self, rows: int, cols: int, boards: Tuple[int, int], heights: Tuple[int, ...],
+                 moves: Tuple[int, ...], winner: Optional[int] = None):
+        for name, value in (('rows', rows), ('cols', cols), ('boards', boards),
+                            ('heights', heights), ('moves', moves), ('winner', winner)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("GameState is immutable")
+
+    @classmethod
+    def from_position(cls, position: Position, winner: Optional[int] = None) -> 'GameState':
+        """Snapshot a position and the game's winner."""
+        return cls(position.rows, position.cols, tuple(position.boards),
+                   tuple(position.heights), tuple(position.history), winner)
+
+    @classmethod
+    def initial(cls, rows: int = 6, cols: int = 7) -> 'GameState':
+        """Get the state of an empty board."""
+        return cls(rows, cols, (0, 0), (0,) * cols, ())
+
+    @property
+    def move_count(self) -> int:
+        """Number of pieces on the board."""
+        return len(self.moves)
+
+    @property
+    def current_player(self) -> int:
+        """Player (1 or 2) whose turn it is."""
+        return 1 + (len(self.moves) & 1)
+
+    @property
+    def finished(self) -> bool:
+        """Check whether the game has been won or drawn."""
+        return self.winner is not None
+
+    def to_position(self) -> Position:
+        """Build a live position from the snapshot."""
+        position = Position(self.rows, self.cols)
+        position.boards = list(self.boards)
+        position.heights = list(self.heights)
+        position.moves = len(self.moves)
+        position.history = list(self.moves)
+        return position
+
+    def to_board(self) -> List[List[int]]:
+        """Render the snapshot as a top-down list-of-lists board."""
+        stride = self.rows + 1
+        board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        for col, height in enumerate(self.heights):
+            for level in range(height):
+                bit = 1 << (col * stride + level)
+                board[self.rows - 1 - level][col] = 1 if self.boards[0] & bit else 2
+        return board
+
+    def can_play(self, col: int) -> bool:
+        """Check whether a column of an unfinished game still has room."""
+        return self.winner is None and 0 <= col < self.cols and self.heights[col] < self.rows
+
+    def play(self, col: int) -> 'GameState':
+        """Get the state after the side to move plays ``col``."""
+        if not self.can_play(col):
+            raise ValueError(f"Column {col} cannot be played")
+        side = len(self.moves) & 1
+        stride = self.rows + 1
+        bits = self.boards[side] | (1 << (col * stride + self.heights[col]))
+        boards = (bits, self.boards[1]) if side == 0 else (self.boards[0], bits)
+        heights = self.heights[:col] + (self.heights[col] + 1,) + self.heights[col + 1:]
+        moves = self.moves + (col,)
+
+        winner = None
+        if has_four(bits, stride):
+            winner = side + 1
+        elif len(moves) == self.rows * self.cols:
+            winner = 0
+        return GameState(self.rows, self.cols, boards, heights, moves, winner)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return ((self.rows, self.cols, self.moves, self.winner)
+                == (other.rows, other.cols, other.moves, other.winner))
+
+    def __hash__(self) -> int:
+        return hash((self.rows, self.cols, self.moves))
+
+    def __repr__(self) -> str:
+        played = ''.join(str(col + 1) for col in self.moves) or '-'
+        return f"GameState({self.rows}x{self.cols}, moves={played}, winner={self.winner})"
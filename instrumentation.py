@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Search Instrumentation
+Opt-in counters, timings and profiling for the AI search.
+
+An InstrumentedSearch is a drop-in AlphaBetaSearch that records nodes, leaf
+evaluations, cutoffs and iterations into a SearchStats object.  The plain
+search is left untouched, so the counters cost nothing until a game turns
+them on with ConnectFourGame.enable_search_stats().
+
+Usage:
+    python instrumentation.py 4453 --depth 8
+    python instrumentation.py 4453 --depth 8 --profile move.prof
+"""
+
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from evaluation import IncrementalEvaluator
+from search import AlphaBetaSearch
+from transposition import TranspositionTable
+
+# Transposition table counters reported as the change over one move
+TABLE_COUNTERS = ('hits', 'misses', 'collisions', 'stores', 'overwrites', 'rejected')
+
+
+class SearchStats:
+    """Counters and timings of one instrumented AI move."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear every counter before the next move."""
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.solver_nodes = 0
+        self.nodes_by_depth: Dict[int, int] = {}
+        self.cutoffs_by_depth: Dict[int, int] = {}
+        self.first_move_cutoffs = 0
+        self.iterations: List[Dict[str, Any]] = []
+        self.phases: Dict[str, float] = {}
+        self.table: Dict[str, float] = {}
+        self._table_start: Dict[str, float] = {}
+        self.time = 0.0
+        self._start_time = 0.0
+
+    def begin(self, table: TranspositionTable) -> None:
+        """Start recording a move searched with the given table."""
+        self.reset()
+        self._table_start = table.get_stats()
+        self._start_time = time.perf_counter()
+
+    def end(self, table: TranspositionTable) -> None:
+        """Finish recording a move and take the table counters."""
+        self.time = time.perf_counter() - self._start_time
+        current = table.get_stats()
+        self.table = {name: current[name] - self._table_start[name] for name in TABLE_COUNTERS}
+        probes = self.table['hits'] + self.table['misses']
+        self.table['hit_rate'] = self.table['hits'] / probes if probes else 0.0
+        self.table['entries'] = current['entries']
+        self.table['capacity'] = current['capacity']
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the wall time of a block to the named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def effective_branching_factor(self) -> float:
+        """Get b such that b + b^2 + ... + b^d equals the nodes of the deepest iteration."""
+        completed = [it for it in self.iterations if it['completed']]
+        if not completed:
+            return 0.0
+        depth, nodes = completed[-1]['depth'], completed[-1]['nodes']
+        if depth <= 0 or nodes <= 1:
+            return float(nodes)
+
+        def tree_size(b: float) -> float:
+            return sum(b ** d for d in range(1, depth + 1))
+
+        low, high = 0.0, float(nodes)
+        for _ in range(100):
+            middle = (low + high) / 2
+            if tree_size(middle) < nodes:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+
+    def get_report(self) -> Dict[str, Any]:
+        """Get every counter as a plain dict, e.g. for logging as JSON."""
+        cutoffs = sum(self.cutoffs_by_depth.values())
+        return {
+            'time': self.time,
+            'phases': dict(self.phases),
+            'nodes': self.nodes,
+            'leaf_evals': self.leaf_evals,
+            'solver_nodes': self.solver_nodes,
+            'nodes_per_second': self.nodes / self.time if self.time else 0.0,
+            'nodes_by_depth': dict(sorted(self.nodes_by_depth.items())),
+            'cutoffs': cutoffs,
+            'cutoffs_by_depth': dict(sorted(self.cutoffs_by_depth.items())),
+            'first_move_cutoff_rate': self.first_move_cutoffs / cutoffs if cutoffs else 0.0,
+            'effective_branching_factor': self.effective_branching_factor(),
+            'iterations': list(self.iterations),
+            'table': dict(self.table),
+        }
+
+    def format(self) -> str:
+        """Summarize the last move for the terminal."""
+        report = self.get_report()
+        lines = [f"Move time:      {report['time'] * 1000:.2f} ms"]
+        for name, seconds in report['phases'].items():
+            lines.append(f"  {name:<12}  {seconds * 1000:.2f} ms")
+        lines.append(f"Nodes:          {report['nodes']} ({report['nodes_per_second']:.0f}/s)")
+        lines.append(f"Leaf evals:     {report['leaf_evals']}")
+        if report['solver_nodes']:
+            lines.append(f"Solver nodes:   {report['solver_nodes']}")
+        lines.append(f"Branching:      {report['effective_branching_factor']:.2f} effective")
+        lines.append(f"Cutoffs:        {report['cutoffs']} "
+                     f"({report['first_move_cutoff_rate']:.1%} on the first move)")
+        for depth, count in sorted(report['cutoffs_by_depth'].items(), reverse=True):
+            lines.append(f"  depth {depth:<3}  {count:>8} of {report['nodes_by_depth'].get(depth, 0)} nodes")
+        for iteration in report['iterations']:
+            state = "" if iteration['completed'] else "  (aborted)"
+            lines.append(f"Iteration {iteration['depth']:<3}  {iteration['nodes']:>8} nodes  "
+                         f"{iteration['time'] * 1000:8.2f} ms{state}")
+        table = report['table']
+        if table:
+            lines.append(f"Table:          {table['hits']} hits, {table['misses']} misses "
+                         f"({table['hit_rate']:.1%}), {table['stores']} stores, "
+                         f"{table['collisions']} collisions, {table['entries']}/{table['capacity']} used")
+        return "\n".join(lines)
+
+
+class InstrumentedSearch(AlphaBetaSearch):
+    """Alpha-beta search that records its work into a SearchStats object."""
+
+    def __init__(self, table: Optional[TranspositionTable] = None,
+                 stats: Optional[SearchStats] = None):
+        super().__init__(table)
+        self.stats = stats if stats is not None else SearchStats()
+
+    def search(self, position, depth: int, alpha: float = -float('inf'),
+               beta: float = float('inf')) -> Tuple[float, int]:
+        """Search to a fixed depth, recording it as one iteration."""
+        with self._iteration(depth):
+            return super().search(position, depth, alpha, beta)
+
+    def _search_root(self, evaluator: IncrementalEvaluator, depth: int,
+                     order: List[int]) -> Tuple[float, int]:
+        """Search one iterative-deepening iteration, recording it."""
+        with self._iteration(depth):
+            return super()._search_root(evaluator, depth, order)
+
+    @contextmanager
+    def _iteration(self, depth: int) -> Iterator[None]:
+        """Record the nodes and time of one search iteration."""
+        start_nodes = self.nodes
+        start = time.perf_counter()
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            nodes = self.nodes - start_nodes
+            self.stats.nodes += nodes
+            self.stats.iterations.append({'depth': depth, 'nodes': nodes, 'completed': completed,
+                                          'time': time.perf_counter() - start})
+
+    def _negamax(self, evaluator: IncrementalEvaluator, depth: int, alpha: float,
+                 beta: float) -> Tuple[float, int]:
+        """Count the node and any leaf evaluation, then search it."""
+        stats = self.stats
+        stats.nodes_by_depth[depth] = stats.nodes_by_depth.get(depth, 0) + 1
+        if depth == 0:
+            stats.leaf_evals += 1
+        return super()._negamax(evaluator, depth, alpha, beta)
+
+    def _record_cutoff(self, position, col: int, depth: int, index: int) -> None:
+        """Count the cutoff by depth, then update the ordering tables."""
+        stats = self.stats
+        stats.cutoffs_by_depth[depth] = stats.cutoffs_by_depth.get(depth, 0) + 1
+        if index == 0:
+            stats.first_move_cutoffs += 1
+        super()._record_cutoff(position, col, depth, index)
+
+
+def profile_call(func: Callable[..., Any], *args: Any, path: Optional[str] = None,
+                 **kwargs: Any) -> Tuple[Any, pstats.Stats]:
+    """Run a function under cProfile, returning its result and the profile.
+
+    With ``path`` the raw profile is also written there, ready for pstats,
+    snakeviz or a flame-graph converter such as flameprof.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    if path:
+        profiler.dump_stats(path)
+    return result, pstats.Stats(profiler)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    from connect_four_game import ConnectFourGame
+
+    parser = argparse.ArgumentParser(description="Instrument the hard AI on one position.")
+    parser.add_argument('moves', nargs='?', default='', help="position as 1-based columns")
+    parser.add_argument('--depth', type=int, help="fixed search depth")
+    parser.add_argument('--time-ms', type=float, help="iterative-deepening time budget")
+    parser.add_argument('--profile', help="also write a cProfile dump of the move here")
+    args = parser.parse_args(argv)
+
+    game = ConnectFourGame()
+    game.settings['ai_difficulty'] = 'hard'
+    if args.depth is not None:
+        game.settings['search_depth'] = args.depth
+    if args.time_ms is not None:
+        game.settings['search_time_ms'] = args.time_ms
+    for char in args.moves:
+        game.position.play(int(char) - 1)
+    stats = game.enable_search_stats()
+
+    if args.profile:
+        column, profile = profile_call(game.choose_move, path=args.profile)
+    else:
+        column, profile = game.choose_move(), None
+    print(f"Best column: {column + 1}")
+    print(stats.format())
+    if profile is not None:
+        print()
+        profile.sort_stats('cumulative').print_stats(15)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Tree Search
+UCT search with bitboard rollouts, for an AI that needs no evaluation
+function and returns its best move whenever its budget runs out.
+
+Rollouts play random columns on the raw bitboards, except that a side
+takes an immediate win and blocks an immediate loss.  The tree is kept
+between calls: when the next position follows from the previous root by
+a few moves, the matching subtree becomes the new root with its
+statistics intact.  ParallelMCTS grows independent trees in worker
+processes and adds up their root statistics; a shared cancel flag stops
+every worker at its next clock check.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from bitboard import Position, winning_cells
+
+# Rewards from the point of view of the player who made the move
+WIN, DRAW, LOSS = 1.0, 0.5, 0.0
+
+
+class Node:
+    """One tree node: the position after its column was played."""
+
+    __slots__ = ('column', 'parent', 'children', 'untried', 'visits', 'wins', 'terminal')
+
+    def __init__(self, column: int, parent: Optional['Node'], untried: List[int],
+                 terminal: Optional[float] = None):
+        self.column = column
+        self.parent = parent
+        self.children: List['Node'] = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0  # rewards of the player who played ``column``
+        self.terminal = terminal
+
+    def child(self, column: int) -> Optional['Node']:
+        """Get the child reached by a column, if it has been expanded."""
+        for node in self.children:
+            if node.column == column:
+                return node
+        return None
+
+
+class MCTS:
+    """UCT search that keeps its tree between moves of the same game."""
+
+    # Iterations between two checks of the clock
+    CHECK_INTERVAL = 64
+
+    def __init__(self, exploration: float = 1.4, rng: Any = None):
+        self.exploration = exploration
+        self.random = rng if rng is not None else random
+        self.root: Optional[Node] = None
+        self._root_history: Optional[List[int]] = None
+        self._geometry: Optional[Tuple[int, int]] = None
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """Stop the running or next search; it returns its best move so far.
+        The cancel holds until clear_cancel() is called."""
+        self._cancelled = True
+
+    def clear_cancel(self) -> None:
+        """Let searches run again after a cancel; call before scheduling one."""
+        self._cancelled = False
+
+    def _setup(self, position: Position) -> None:
+        """Cache the masks of the position's board geometry."""
+        geometry = (position.rows, position.cols)
+        if geometry == self._geometry:
+            return
+        self._geometry = geometry
+        self.root = None
+        self.size = position.rows * position.cols
+        self.stride = position.stride
+        self.bottom_mask = position.bottom_mask
+        self.board_mask = position.board_mask
+        center = (position.cols - 1) / 2
+        self.columns = sorted(range(position.cols), key=lambda col: abs(col - center))
+        self.column_masks = position.column_masks
+
+    def _moves(self, mask: int) -> List[int]:
+        """List the playable columns of a position."""
+        possible = (mask + self.bottom_mask) & self.board_mask
+        column_masks = self.column_masks
+        return [col for col in self.columns if possible & column_masks[col]]
+
+    def _find_root(self, position: Position) -> Tuple[Node, bool]:
+        """Get the node of the position, reusing the previous tree when it leads there."""
+        history = position.history
+        root = self.root
+        complete = position.moves == len(history)
+        if root is not None and complete and self._root_history is not None \
+                and history[:len(self._root_history)] == self._root_history:
+            for col in history[len(self._root_history):]:
+                root = root.child(col)
+                if root is None:
+                    break
+            if root is not None and root.terminal is None:
+                root.parent = None
+                self.root, self._root_history = root, list(history)
+                return root, True
+
+        self.root = Node(-1, None, self._moves(position.mask))
+        self._root_history = list(history) if complete else None
+        return self.root, False
+
+    def search(self, position: Position, iterations: Optional[int] = None,
+               time_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Grow the tree until the iteration or time budget runs out.
+
+        Returns the most visited column with the statistics of every root
+        move; with no budget at all a single iteration per root move is run.
+        """
+        start_time = time.perf_counter()
+        self._setup(position)
+        root, reused = self._find_root(position)
+        reused_visits = root.visits
+
+        if iterations is None and time_ms is None:
+            iterations = len(root.untried) + len(root.children)
+        deadline = start_time + time_ms / 1000.0 if time_ms is not None else None
+
+        current = position.boards[position.moves & 1]
+        mask = position.mask
+        moves = position.moves
+        count = 0
+        while root.untried or root.children:
+            if iterations is not None and count >= iterations:
+                break
+            if count % self.CHECK_INTERVAL == 0 and count and self._out_of_budget(deadline):
+                break
+            self._iterate(root, current, mask, moves)
+            count += 1
+
+        result = self.get_root_stats()
+        result.update(iterations=count, reused_visits=reused_visits if reused else 0,
+                      time=time.perf_counter() - start_time)
+        return result
+
+    def _out_of_budget(self, deadline: Optional[float]) -> bool:
+        """Check whether the search was cancelled or its time is up."""
+        return self._cancelled or (deadline is not None and time.perf_counter() >= deadline)
+
+    def get_root_stats(self) -> Dict[str, Any]:
+        """Get the best column and the visits and win rate of every root move."""
+        root = self.root
+        visits = {node.column: node.visits for node in root.children}
+        wins = {node.column: node.wins for node in root.children}
+        return _summarize(visits, wins)
+
+    def _iterate(self, root: Node, current: int, mask: int, moves: int) -> None:
+        """Run one select, expand, simulate and backpropagate step."""
+        exploration = self.exploration
+        column_masks = self.column_masks
+        bottom_mask, board_mask = self.bottom_mask, self.board_mask
+        node = root
+
+        # Select
+        while not node.untried and node.children and node.terminal is None:
+            log_visits = math.log(node.visits)
+            best, best_value = None, -1.0
+            for child in node.children:
+                value = (child.wins / child.visits
+                         + exploration * math.sqrt(log_visits / child.visits))
+                if value > best_value:
+                    best, best_value = child, value
+            node = best
+            move = ((mask + bottom_mask) & board_mask) & column_masks[node.column]
+            current, mask = current ^ mask, mask | move
+            moves += 1
+
+        # Expand
+        if node.terminal is None and node.untried:
+            untried = node.untried
+            col = untried.pop(self.random.randrange(len(untried)))
+            move = ((mask + bottom_mask) & board_mask) & column_masks[col]
+            won = winning_cells(current, mask, self.stride, board_mask) & move
+            current, mask = current ^ mask, mask | move
+            moves += 1
+            if won:
+                child = Node(col, node, [], WIN)
+            elif moves == self.size:
+                child = Node(col, node, [], DRAW)
+            else:
+                child = Node(col, node, self._moves(mask))
+            node.children.append(child)
+            node = child
+
+        # Simulate
+        if node.terminal is not None:
+            reward = node.terminal
+        else:
+            reward = 1.0 - self._rollout(current, mask)
+
+        # Backpropagate
+        while node is not None:
+            node.visits += 1
+            node.wins += reward
+            reward = 1.0 - reward
+            node = node.parent
+
+    def _rollout(self, current: int, mask: int) -> float:
+        """Play a position out and return the reward of the side to move."""
+        stride, bottom_mask, board_mask = self.stride, self.bottom_mask, self.board_mask
+        column_masks = self.column_masks
+        choice = self.random.choice
+        reward = WIN
+        while True:
+            possible = (mask + bottom_mask) & board_mask
+            if not possible:
+                return DRAW
+            if winning_cells(current, mask, stride, board_mask) & possible:
+                return reward
+            threats = winning_cells(current ^ mask, mask, stride, board_mask) & possible
+            if threats:
+                move = threats & -threats
+            else:
+                move = possible & choice([m for m in column_masks if possible & m])
+            current, mask = current ^ mask, mask | move
+            reward = 1.0 - reward
+
+
+def _summarize(visits: Dict[int, int], wins: Dict[int, float]) -> Dict[str, Any]:
+    """Pick the most visited column from per-column root statistics."""
+    scores = {col: wins[col] / visits[col] if visits[col] else 0.0 for col in visits}
+    if not visits:
+        return {'column': -1, 'visits': 0, 'value': 0.0, 'scores': scores}
+    column = max(visits, key=lambda col: (visits[col], scores[col]))
+    return {'column': column, 'visits': sum(visits.values()), 'value': scores[column],
+            'scores': scores, 'root_visits': visits}
+
+
+# Per-process worker state: the cancel flag shared with the parent, set up
+# by _init_worker, the tree, set up on first use, and the search it last served
+_shared_cancel = None
+_worker_mcts: Optional[MCTS] = None
+_worker_search_id: Optional[int] = None
+
+
+class _WorkerMCTS(MCTS):
+    """Worker tree search that also stops once the parallel search is cancelled."""
+
+    def _out_of_budget(self, deadline: Optional[float]) -> bool:
+        return bool(_shared_cancel.value) or super()._out_of_budget(deadline)
+
+
+def _init_worker(shared_cancel: Any) -> None:
+    """Set up the cancel flag shared with the parent process."""
+    global _shared_cancel
+    _shared_cancel = shared_cancel
+
+
+def _worker_search(task: Tuple[List[List[int]], List[int], Optional[int],
+                               Optional[float], float, int, int]) -> Dict[str, Any]:
+    """Grow this worker's tree for a position and return its root statistics.
+
+    The tree is kept from one search to the next, but a second task of the
+    same search starts a fresh one, so no playout is reported twice.
+    """
+    global _worker_mcts, _worker_search_id
+    board, history, iterations, time_ms, exploration, seed, search_id = task
+    if _worker_mcts is None or _worker_mcts.exploration != exploration:
+        _worker_mcts = _WorkerMCTS(exploration)
+    elif search_id == _worker_search_id:
+        _worker_mcts.root = None
+    _worker_search_id = search_id
+    _worker_mcts.random = random.Random(seed)
+
+    if history is not None:
+        position = Position(len(board), len(board[0]))
+        for col in history:
+            position.play(col)
+    else:
+        position = Position.from_board(board)
+    return _worker_mcts.search(position, iterations, time_ms)
+
+
+class ParallelMCTS:
+    """Process pool growing one tree per worker and merging their root statistics."""
+
+    def __init__(self, workers: Optional[int] = None, exploration: float = 1.4):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.exploration = exploration
+        self._shared_cancel = multiprocessing.Value('b', 0)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self._shared_cancel,))
+        self._search_id = 0
+
+    def cancel(self) -> None:
+        """Stop the running or next search; it returns the best move found so far.
+        The cancel holds until clear_cancel() is called."""
+        self._shared_cancel.value = 1
+
+    def clear_cancel(self) -> None:
+        """Let searches run again after a cancel; call before scheduling one."""
+        self._shared_cancel.value = 0
+
+    def search(self, position: Position, iterations: Optional[int] = None,
+               time_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Search with the iterations split across workers, or each using the full time."""
+        start_time = time.perf_counter()
+        per_worker = -(-iterations // self.workers) if iterations is not None else None
+        history = list(position.history) if position.moves == len(position.history) else None
+        board = position.to_board()
+        seed = random.getrandbits(32)
+        self._search_id += 1
+        futures = [self._pool.submit(_worker_search, (board, history, per_worker, time_ms,
+                                                      self.exploration, seed + worker,
+                                                      self._search_id))
+                   for worker in range(self.workers)]
+
+        visits: Dict[int, int] = {}
+        wins: Dict[int, float] = {}
+        count = 0
+        for future in futures:
+            result = future.result()
+            count += result['iterations']
+            for col, col_visits in result.get('root_visits', {}).items():
+                visits[col] = visits.get(col, 0) + col_visits
+                wins[col] = wins.get(col, 0.0) + result['scores'][col] * col_visits
+
+        result = _summarize(visits, wins)
+        result.update(iterations=count, time=time.perf_counter() - start_time)
+        return result
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        self._pool.shutdown()
+
+    def __enter__(self) -> 'ParallelMCTS':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
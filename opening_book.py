@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Opening Book
+Generates and reads a precomputed book of opening moves.
+
+A book file is a small header followed by fixed-size records sorted by
+canonical position key, so a position and its mirror image share one record
+whose column is stored in the canonical orientation.  Readers memory-map the
+file and binary-search the records, so opening a book costs nothing up front
+and a lookup touches a handful of pages.
+
+Usage:
+    python opening_book.py build book.bin --plies 8 --depth 8 --workers 4
+    python opening_book.py lookup book.bin 4455
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bitboard import Position
+from search import AlphaBetaSearch
+
+MAGIC = b'C4BK'
+VERSION = 2
+HEADER = struct.Struct('<4sHBBBxxxI')  # magic, version, rows, cols, plies, count
+RECORD = struct.Struct('<QB')  # canonical position key, best column
+
+
+class OpeningBook:
+    """Memory-mapped, read-only opening book."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.rows, self.cols, self.plies, self.count = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not an opening book file: {path}")
+        if len(self._mmap) < HEADER.size + self.count * RECORD.size:
+            self._mmap.close()
+            raise ValueError(f"Truncated opening book file: {path}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup_key(self, key: int) -> int:
+        """Get the book column stored for a position key, or -1."""
+        data, record, base = self._mmap, RECORD, HEADER.size
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            stored, column = record.unpack_from(data, base + middle * record.size)
+            if stored == key:
+                return column
+            if stored < key:
+                low = middle + 1
+            else:
+                high = middle
+        return -1
+
+    def lookup(self, position: Position) -> int:
+        """Get the book column for a position, or -1 if it is not in the book."""
+        if (position.rows, position.cols) != (self.rows, self.cols):
+            return -1
+        if position.moves >= self.plies:
+            return -1
+        key, mirrored = position.canonical_key()
+        column = self.lookup_key(key)
+        return position.mirror_column(column) if mirrored else column
+
+    def close(self) -> None:
+        """Unmap the book file."""
+        self._mmap.close()
+
+    def __enter__(self) -> 'OpeningBook':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_book(path: str, entries: Dict[int, int], rows: int, cols: int, plies: int) -> None:
+    """Write book entries (key -> column) sorted by key, replacing the file atomically."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, plies, len(entries)))
+        for key in sorted(entries):
+            f.write(RECORD.pack(key, entries[key]))
+    os.replace(temp_path, path)
+
+
+def enumerate_positions(plies: int, rows: int = 6, cols: int = 7) -> Iterator[Tuple[int, List[int]]]:
+    """Yield (canonical key, moves) for every distinct undecided position with
+    fewer than ``plies`` moves, counting mirror images once."""
+    frontier = {Position(rows, cols).canonical_key()[0]: []}
+    for _ in range(plies):
+        next_frontier: Dict[int, List[int]] = {}
+        for key, moves in frontier.items():
+            yield key, moves
+            position = _replay(moves, rows, cols)
+            for col in position.playable_columns():
+                position.play(col)
+                if not position.is_win(1 + ((position.moves - 1) & 1)):
+                    next_frontier.setdefault(position.canonical_key()[0], moves + [col])
+                position.undo()
+        frontier = next_frontier
+
+
+def _replay(moves: List[int], rows: int, cols: int) -> Position:
+    """Build a position by playing a move sequence."""
+    position = Position(rows, cols)
+    for col in moves:
+        position.play(col)
+    return position
+
+
+def _book_move(task: Tuple[List[int], int, int, int]) -> Tuple[int, int]:
+    """Search one book position and return (canonical key, canonical best column)."""
+    moves, rows, cols, depth = task
+    position = _replay(moves, rows, cols)
+    searcher = _book_searcher()
+    _, column = searcher.search(position, depth)
+    key, mirrored = position.canonical_key()
+    return key, position.mirror_column(column) if mirrored else column
+
+
+_searcher: Optional[AlphaBetaSearch] = None
+
+
+def _book_searcher() -> AlphaBetaSearch:
+    """Get this process's search, keeping its table warm across positions."""
+    global _searcher
+    if _searcher is None:
+        _searcher = AlphaBetaSearch()
+    return _searcher
+
+
+def build_book(path: str, plies: int, depth: int, rows: int = 6, cols: int = 7,
+               workers: int = 1) -> int:
+    """Search every position up to ``plies`` moves deep and write the book file."""
+    tasks = [(moves, rows, cols, depth) for _, moves in enumerate_positions(plies, rows, cols)]
+    entries: Dict[int, int] = {}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for key, column in pool.map(_book_move, tasks, chunksize=16):
+                entries[key] = column
+    else:
+        for task in tasks:
+            key, column = _book_move(task)
+            entries[key] = column
+
+    write_book(path, entries, rows, cols, plies)
+    return len(entries)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Build or query a Connect Four opening book.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="generate a book file")
+    build.add_argument('path')
+    build.add_argument('--plies', type=int, default=8, help="book positions have fewer moves than this")
+    build.add_argument('--depth', type=int, default=8, help="search depth per position")
+    build.add_argument('--workers', type=int, default=1, help="search processes")
+
+    lookup = commands.add_parser('lookup', help="look up a position given as 1-based columns")
+    lookup.add_argument('path')
+    lookup.add_argument('moves', nargs='?', default='')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        start = time.perf_counter()
+        count = build_book(args.path, args.plies, args.depth, workers=args.workers)
+        print(f"Wrote {count} positions to {args.path} in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    with OpeningBook(args.path) as book:
+        position = _replay([int(c) - 1 for c in args.moves], book.rows, book.cols)
+        column = book.lookup(position)
+    if column == -1:
+        print("Position not in book")
+        return 1
+    print(column + 1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
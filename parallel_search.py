@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Parallel Root Search
+Splits the root moves of an alpha-beta search across a process pool.
+
+Workers share the best root score found so far and search their move with a
+window just below it.  A move that fails low cannot beat (or tie) the best
+move, and any move that does not fail low gets an exact score, so picking the
+highest score with ties broken by move order gives the same score as the
+serial search at the same depth, whatever order the workers finish in.  The
+serial search tries the move its table holds first and keeps it on ties, so
+passing that move in gives the same move as well.
+A shared cancel flag stops every worker at its next budget check.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from bitboard import Position
+from search import AlphaBetaSearch, SearchTimeout, WIN_SCORE
+from transposition import TranspositionTable
+
+# Per-process worker state, set up by _init_worker
+_shared_alpha = None
+_shared_cancel = None
+_worker_search: Optional[AlphaBetaSearch] = None
+
+
+class _WorkerSearch(AlphaBetaSearch):
+    """Worker search that also stops once the root search is cancelled."""
+
+    def _check_budget(self) -> None:
+        if _shared_cancel.value:
+            raise SearchTimeout()
+        super()._check_budget()
+
+
+def _init_worker(shared_alpha: Any, shared_cancel: Any, table_bytes: int) -> None:
+    """Set up the shared alpha bound, the cancel flag and the worker's own search."""
+    global _shared_alpha, _shared_cancel, _worker_search
+    _shared_alpha = shared_alpha
+    _shared_cancel = shared_cancel
+    _worker_search = _WorkerSearch(TranspositionTable(max_bytes=table_bytes))
+
+
+def _search_root_move(board: List[List[int]], col: int, depth: int) -> Tuple[int, float, int]:
+    """Search one root move and return (column, score, nodes)."""
+    if _shared_cancel.value:
+        raise SearchTimeout()
+    position = Position.from_board(board)
+    position.play(col)
+
+    with _shared_alpha.get_lock():
+        alpha = _shared_alpha.value
+    # Scores are integers, so a window starting just below the best score
+    # still returns exact scores for moves that tie it.
+    window_alpha = alpha - 1 if alpha != -float('inf') else alpha
+
+    searcher = _worker_search
+    searcher.table.clear()
+    searcher.nodes = 0
+    score = -searcher.search(position, depth - 1, -float('inf'), -window_alpha)[0]
+
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return col, score, searcher.nodes
+
+
+class ParallelRootSearch:
+    """Process pool that searches the root moves of a position in parallel."""
+
+    def __init__(self, workers: Optional[int] = None, table_bytes: int = 4 * 1024 * 1024):
+        self.workers = workers or multiprocessing.cpu_count()
+        self._root_search = AlphaBetaSearch(TranspositionTable(max_bytes=0))
+        self._shared_alpha = multiprocessing.Value('d', -float('inf'))
+        self._shared_cancel = multiprocessing.Value('b', 0)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         initializer=_init_worker,
+                                         initargs=(self._shared_alpha, self._shared_cancel,
+                                                   table_bytes))
+
+    def cancel(self) -> None:
+        """Stop the running or next search; it raises SearchTimeout once every
+        worker has stopped.  The cancel holds until clear_cancel() is called."""
+        self._shared_cancel.value = 1
+
+    def clear_cancel(self) -> None:
+        """Let searches run again after a cancel; call before scheduling one."""
+        self._shared_cancel.value = 0
+
+    def search(self, position: Position, depth: int, tt_move: int = -1) -> Dict[str, Any]:
+        """Search to a fixed depth, scored from the side to move.
+
+        ``tt_move`` is the serial search's table move for the position, if any;
+        it is searched first and wins ties like it does there.
+
+        Raises SearchTimeout when cancelled, after waiting for every worker,
+        so the pool is idle again whenever this returns.
+        """
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+
+        win_col, moves = self._root_search.root_moves(position, tt_move)
+        if win_col != -1:
+            return {'column': win_col, 'score': WIN_SCORE, 'depth': depth, 'nodes': 0}
+        if not moves:
+            return {'column': -1, 'score': 0, 'depth': depth, 'nodes': 0}
+
+        with self._shared_alpha.get_lock():
+            self._shared_alpha.value = -float('inf')
+
+        board = position.to_board()
+        futures = [self._pool.submit(_search_root_move, board, col, depth) for col in moves]
+        scores = {}
+        nodes = 0
+        cancelled = False
+        for future in futures:
+            try:
+                col, score, worker_nodes = future.result()
+            except SearchTimeout:
+                cancelled = True
+                continue
+            scores[col] = score
+            nodes += worker_nodes
+        if cancelled:
+            raise SearchTimeout()
+
+        # Highest score wins; ties go to the earliest move in search order
+        best_column = moves[0]
+        for col in moves:
+            if scores[col] > scores[best_column]:
+                best_column = col
+        return {'column': best_column, 'score': scores[best_column], 'depth': depth,
+                'nodes': nodes}
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        self._pool.shutdown()
+
+    def __enter__(self) -> 'ParallelRootSearch':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
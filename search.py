@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Alpha-Beta Search
+Negamax search with alpha-beta pruning over a bitboard position, with an
+iterative-deepening mode bounded by a time or node budget.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bitboard import Position
+from evaluation import IncrementalEvaluator
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+WIN_SCORE = 1000000
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time or node budget runs out."""
+
+
+class AlphaBetaSearch:
+    """Negamax alpha-beta search sharing one transposition table across calls."""
+
+    # Nodes between two budget checks
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, table: Optional[TranspositionTable] = None):
+        self.table = table if table is not None else TranspositionTable()
+        self.nodes = 0
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+        self._next_check = 0
+        self._cancelled = False
+        self._evaluator: Optional[IncrementalEvaluator] = None
+
+        # Move ordering state, cleared at the start of every search
+        self.killers: List[List[int]] = []
+        self.history: List[List[int]] = []
+        self._center_order: List[int] = []
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def _attach(self, position: Position) -> IncrementalEvaluator:
+        """Get an incremental evaluator synced to the position about to be searched."""
+        evaluator = self._evaluator
+        if evaluator is None or evaluator.position is not position:
+            evaluator = self._evaluator = IncrementalEvaluator(position)
+        else:
+            evaluator.sync()
+        return evaluator
+
+    def _reset_ordering(self, position: Position) -> None:
+        """Clear the killer and history tables and the cutoff counters."""
+        cells = position.cols * position.stride
+        self.killers = [[-1, -1] for _ in range(position.rows * position.cols + 1)]
+        self.history = [[0] * cells, [0] * cells]
+        center = (position.cols - 1) / 2
+        self._center_order = sorted(range(position.cols), key=lambda col: abs(col - center))
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def get_ordering_stats(self) -> Dict[str, float]:
+        """Get the cutoff counters of the last search."""
+        return {
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': (self.first_move_cutoffs / self.cutoffs
+                                       if self.cutoffs else 0.0),
+        }
+
+    def cancel(self) -> None:
+        """Stop the running or next search; it raises SearchTimeout (or, when
+        deepening, returns its last completed iteration) at the next budget
+        check.  The cancel holds until clear_cancel() is called."""
+        self._cancelled = True
+
+    def clear_cancel(self) -> None:
+        """Let searches run again after a cancel; call before scheduling one."""
+        self._cancelled = False
+
+    def search(self, position: Position, depth: int, alpha: float = -float('inf'),
+               beta: float = float('inf')) -> Tuple[float, int]:
+        """Search to a fixed depth, returning (score, column) for the side to move."""
+        self._deadline = None
+        self._node_limit = None
+        self._next_check = self.nodes + self.CHECK_INTERVAL
+        self._reset_ordering(position)
+        history_length = len(position.history)
+        evaluator = self._attach(position)
+        try:
+            return self._negamax(evaluator, depth, alpha, beta)
+        finally:
+            while len(position.history) > history_length:
+                evaluator.undo()
+
+    def iterative_deepening(self, position: Position, max_depth: Optional[int] = None,
+                            time_ms: Optional[float] = None,
+                            node_budget: Optional[int] = None) -> Dict[str, Any]:
+        """Deepen one ply at a time until the depth, time or node budget is used up.
+
+        Returns the best move of the deepest completed iteration together with
+        its score, the depth reached and the work spent.
+        """
+        start_time = time.perf_counter()
+        start_nodes = self.nodes
+        self._next_check = self.nodes + self.CHECK_INTERVAL
+        empty_cells = position.rows * position.cols - position.moves
+        if max_depth is None or max_depth > empty_cells:
+            max_depth = empty_cells
+
+        win_col, moves = self.root_moves(position)
+        result = {'column': moves[0] if moves else win_col, 'score': 0, 'depth': 0,
+                  'nodes': 0, 'time': 0.0, 'completed': True}
+        if win_col != -1:
+            result.update(score=WIN_SCORE, depth=1)
+            return result
+        if not moves:
+            return result
+
+        evaluator = self._attach(position)
+        order = moves
+        for depth in range(1, max_depth + 1):
+            # The budget starts with the second iteration so there is always a move to return.
+            if depth == 2:
+                if time_ms is not None:
+                    self._deadline = start_time + time_ms / 1000.0
+                if node_budget is not None:
+                    self._node_limit = start_nodes + node_budget
+                self._next_check = self.nodes + self.CHECK_INTERVAL
+
+            try:
+                score, column = self._search_root(evaluator, depth, order)
+            except SearchTimeout:
+                result['completed'] = False
+                break
+
+            result.update(column=column, score=score, depth=depth)
+            order = [column] + [col for col in moves if col != column]
+
+        self._deadline = None
+        self._node_limit = None
+        result['nodes'] = self.nodes - start_nodes
+        result['time'] = time.perf_counter() - start_time
+        result.update(self.get_ordering_stats())
+        return result
+
+    def _check_budget(self) -> None:
+        """Abort the search once the deadline or node limit has passed."""
+        self._next_check = self.nodes + self.CHECK_INTERVAL
+        if self._cancelled:
+            raise SearchTimeout()
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SearchTimeout()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+
+    def root_moves(self, position: Position, tt_move: int = -1) -> Tuple[int, List[int]]:
+        """Start a new search and get its winning column or ordered root moves,
+        with ``tt_move`` first when it is playable."""
+        self._reset_ordering(position)
+        return self._generate_moves(position, tt_move)
+
+    def table_move(self, position: Position) -> int:
+        """Get the move the table holds for a position, or -1."""
+        key, mirrored = position.canonical_key()
+        entry = self.table.probe(key)
+        if entry is None or entry[3] == -1:
+            return -1
+        return position.mirror_column(entry[3]) if mirrored else entry[3]
+
+    def _generate_moves(self, position: Position, tt_move: int) -> Tuple[int, List[int]]:
+        """Generate ordered moves, or return the winning column if one exists.
+
+        Moves are ordered by transposition-table move, killer moves, history
+        score and finally distance from the center column.
+        """
+        heights, rows = position.heights, position.rows
+        wins = position.winning_cells(1 + (position.moves & 1)) & position.possible()
+        if wins:
+            column_masks = position.column_masks
+            for col in self._center_order:
+                if wins & column_masks[col]:
+                    return col, []
+
+        killer1, killer2 = self.killers[position.moves]
+        history = self.history[position.moves & 1]
+        stride = position.stride
+        scored = []
+        for rank, col in enumerate(self._center_order):
+            height = heights[col]
+            if height >= rows:
+                continue
+            if col == tt_move:
+                priority = 1 << 62
+            elif col == killer1:
+                priority = 1 << 61
+            elif col == killer2:
+                priority = 1 << 60
+            else:
+                priority = history[col * stride + height]
+            scored.append((priority, -rank, col))
+        scored.sort(reverse=True)
+        return -1, [col for _, _, col in scored]
+
+    def _search_root(self, evaluator: IncrementalEvaluator, depth: int,
+                     order: List[int]) -> Tuple[float, int]:
+        """Search every root move in the given order, leaving the position untouched."""
+        position = evaluator.position
+        history_length = len(position.history)
+        alpha, beta = -float('inf'), float('inf')
+        best_score = -float('inf')
+        best_column = order[0]
+        try:
+            for col in order:
+                evaluator.play(col)
+                score = -self._negamax(evaluator, depth - 1, -beta, -alpha)[0]
+                evaluator.undo()
+
+                if score > best_score:
+                    best_score = score
+                    best_column = col
+                alpha = max(alpha, score)
+        finally:
+            while len(position.history) > history_length:
+                evaluator.undo()
+
+        key, mirrored = position.canonical_key()
+        self.table.store(key, depth, best_score, EXACT,
+                         position.mirror_column(best_column) if mirrored else best_column)
+        return best_score, best_column
+
+    def _negamax(self, evaluator: IncrementalEvaluator, depth: int, alpha: float,
+                 beta: float) -> Tuple[float, int]:
+        """Negamax alpha-beta search scored from the side to move."""
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+
+        position = evaluator.position
+        if depth == 0:
+            score = evaluator.score
+            return (score if position.moves & 1 else -score), -1
+
+        table = self.table
+        # Mirror images share one entry; stored moves are in canonical orientation
+        key, mirrored = position.canonical_key()
+        entry = table.probe(key)
+        tt_move = -1
+        if entry is not None:
+            tt_move = position.mirror_column(entry[3]) if mirrored else entry[3]
+            if entry[0] >= depth:
+                _, score, bound, _ = entry
+                column = tt_move
+                if bound == EXACT:
+                    return score, column
+                if bound == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score, column
+
+        win_col, available_moves = self._generate_moves(position, tt_move)
+        if win_col != -1:
+            table.store(key, depth, WIN_SCORE, EXACT,
+                        position.mirror_column(win_col) if mirrored else win_col)
+            return WIN_SCORE, win_col
+        if not available_moves:
+            return 0, -1
+
+        alpha_orig = alpha
+        best_score = -float('inf')
+        best_column = available_moves[0]
+
+        for index, col in enumerate(available_moves):
+            evaluator.play(col)
+            score = -self._negamax(evaluator, depth - 1, -beta, -alpha)[0]
+            evaluator.undo()
+
+            if score > best_score:
+                best_score = score
+                best_column = col
+
+            alpha = max(alpha, score)
+            if beta <= alpha:
+                self._record_cutoff(position, col, depth, index)
+                break
+
+        if best_score <= alpha_orig:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        table.store(key, depth, best_score, bound,
+                    position.mirror_column(best_column) if mirrored else best_column)
+
+        return best_score, best_column
+
+    def _record_cutoff(self, position: Position, col: int, depth: int, index: int) -> None:
+        """Update the cutoff counters, killer moves and history for a beta cutoff."""
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+        killers = self.killers[position.moves]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+
+        cell = col * position.stride + position.heights[col]
+        self.history[position.moves & 1][cell] += depth * depth
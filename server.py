@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Game Server
+Asyncio TCP server hosting many game sessions in memory.
+
+Clients speak a line protocol: every request is one JSON object per line
+and gets one JSON response line, carrying back the request's ``id``.
+Sessions live in the server process as bitboard positions, with no files
+and no Tk loop involved; AI moves run in a bounded process pool.  When
+every pool slot is taken, requests wait for one until their deadline and
+are then turned away, so a burst of clients cannot queue unbounded work.
+
+Commands:
+    {"cmd": "new", "engine": "hard", "ai_player": 2}
+    {"cmd": "move", "session": "...", "column": 3}
+    {"cmd": "ai", "session": "..."}
+    {"cmd": "state", "session": "..."}
+    {"cmd": "close", "session": "..."}
+    {"cmd": "stats"}
+
+Usage:
+    python server.py serve --port 8765 --workers 4
+    python server.py load --port 8765 --clients 50 --games 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, List, Optional
+
+from bitboard import Position
+from connect_four_game import ConnectFourGame
+
+SESSION_COMMANDS = ('move', 'ai', 'state', 'close')
+
+# Engines clients can pick by name.  Their settings are fixed here and never
+# taken from a request, and each searches in its pool worker process alone.
+ENGINE_PRESETS: Dict[str, Dict[str, Any]] = {
+    'easy': {'ai_difficulty': 'easy'},
+    'medium': {'ai_difficulty': 'medium'},
+    'hard': {'ai_difficulty': 'hard', 'search_workers': 1},
+    'mcts': {'ai_difficulty': 'mcts', 'mcts_workers': 1},
+}
+
+# Engine instances of a worker process, at most one per preset
+_engines: Dict[str, ConnectFourGame] = {}
+
+
+def _ai_move(preset: str, history: List[int]) -> int:
+    """Pick the preset engine's move for a position given by its moves (worker process)."""
+    engine = _engines.get(preset)
+    if engine is None:
+        engine = ConnectFourGame()
+        engine.settings.update(ENGINE_PRESETS[preset])
+        _engines[preset] = engine
+    position = Position(engine.ROWS, engine.COLS)
+    for col in history:
+        position.play(col)
+    return engine.choose_move(position)
+
+
+def percentiles(values: List[float], points=(50, 90, 99)) -> Dict[str, float]:
+    """Get nearest-rank percentiles of a list of values."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f'p{point}': 0.0 for point in points}
+    last = len(ordered) - 1
+    return {f'p{point}': ordered[min(last, max(0, math.ceil(point / 100 * len(ordered)) - 1))]
+            for point in points}
+
+
+class RequestError(Exception):
+    """A request that cannot be served; its message goes back to the client."""
+
+
+class Session:
+    """One game hosted by the server."""
+
+    __slots__ = ('id', 'position', 'engine', 'ai_player', 'winner', 'lock')
+
+    def __init__(self, session_id: str, engine: str, ai_player: int):
+        self.id = session_id
+        self.position = Position()
+        self.engine = engine
+        self.ai_player = ai_player  # 0 when both sides are clients
+        self.winner: Optional[int] = None  # 0 for a draw once finished
+        self.lock = asyncio.Lock()
+
+    def play(self, col: int) -> None:
+        """Play a column and record the result if it ends the game."""
+        position = self.position
+        player = position.current_player
+        position.play(col)
+        if position.is_win(player):
+            self.winner = player
+        elif position.moves == position.rows * position.cols:
+            self.winner = 0
+
+    def undo(self) -> None:
+        """Take back the last move."""
+        self.position.undo()
+        self.winner = None
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get the session as sent to clients."""
+        position = self.position
+        return {
+            'session': self.id,
+            'moves': ''.join(str(col + 1) for col in position.history),
+            'to_move': position.current_player,
+            'finished': self.winner is not None,
+            'winner': self.winner,
+        }
+
+
+class GameServer:
+    """Session store and request handler behind the TCP server."""
+
+    def __init__(self, workers: int = 1, max_pending: Optional[int] = None,
+                 deadline_ms: float = 5000.0, max_sessions: int = 10000):
+        self.workers = workers
+        self.max_pending = max_pending or 2 * workers
+        self.deadline_ms = deadline_ms
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, Session] = {}
+        self._ids = itertools.count(1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.latencies: Deque[float] = deque(maxlen=10000)
+        self.ai_latencies: Deque[float] = deque(maxlen=10000)
+        self.requests = 0
+        self.errors = 0
+        self.ai_moves = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.started = time.perf_counter()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+        """Start the worker pool and listen for clients."""
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self.started = time.perf_counter()
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """Answer one client's requests in order until it disconnects."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                # Stop reading from a client that does not read its responses
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> Dict[str, Any]:
+        """Decode, serve and time one request line."""
+        start = time.perf_counter()
+        request: Dict[str, Any] = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("request must be a JSON object")
+            response = await self.handle_request(request, start)
+            response['ok'] = True
+        except (RequestError, ValueError, TypeError) as error:
+            self.errors += 1
+            response = {'ok': False, 'error': str(error)}
+        except Exception as error:
+            # Keep the connection for anything else, e.g. a broken worker pool
+            self.errors += 1
+            response = {'ok': False, 'error': f"internal error: {type(error).__name__}"}
+        if 'id' in request:
+            response['id'] = request['id']
+        self.requests += 1
+        self.latencies.append(time.perf_counter() - start)
+        return response
+
+    async def handle_request(self, request: Dict[str, Any], start: float) -> Dict[str, Any]:
+        """Serve one decoded request."""
+        command = request.get('cmd')
+        deadline = start + float(request.get('deadline_ms', self.deadline_ms)) / 1000.0
+        if command == 'stats':
+            return self.get_stats()
+        if command == 'new':
+            return await self._new_session(request, deadline)
+        if command not in SESSION_COMMANDS:
+            raise RequestError(f"unknown command {command!r}")
+
+        session = self.sessions.get(str(request.get('session')))
+        if session is None:
+            raise RequestError("unknown session")
+        if command == 'state':
+            return session.get_state()
+        if command == 'close':
+            del self.sessions[session.id]
+            return {'session': session.id, 'closed': True}
+
+        async with session.lock:
+            if session.winner is not None:
+                raise RequestError("game is over")
+            if command == 'move':
+                return await self._client_move(session, request.get('column'), deadline)
+            if not session.ai_player:
+                raise RequestError("session has no AI player")
+            if session.position.current_player != session.ai_player:
+                raise RequestError("it is not the AI's turn")
+            await self._play_ai_move(session, deadline)
+            return session.get_state()
+
+    async def _new_session(self, request: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        """Create a session, letting the AI open if it plays first."""
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("too many sessions")
+        engine = request.get('engine', 'medium')
+        if not isinstance(engine, str) or engine not in ENGINE_PRESETS:
+            raise RequestError(f"unknown engine {engine!r}; expected one of "
+                               f"{', '.join(ENGINE_PRESETS)}")
+        ai_player = int(request.get('ai_player', 2))
+        if ai_player not in (0, 1, 2):
+            raise RequestError("ai_player must be 0, 1 or 2")
+
+        # Register the session only once the AI's opening move is in, so a
+        # busy or late opening does not leave a session the client never heard of
+        session = Session(str(next(self._ids)), engine, ai_player)
+        if ai_player == 1:
+            async with session.lock:
+                await self._play_ai_move(session, deadline)
+        self.sessions[session.id] = session
+        return session.get_state()
+
+    async def _client_move(self, session: Session, col: Any, deadline: float) -> Dict[str, Any]:
+        """Play the client's column, then the AI's answer; both or neither."""
+        position = session.position
+        if position.current_player == session.ai_player:
+            raise RequestError("it is the AI's turn")
+        if (not isinstance(col, int) or isinstance(col, bool)
+                or not 0 <= col < position.cols or not position.can_play(col)):
+            raise RequestError("invalid column")
+
+        session.play(col)
+        if session.winner is None and session.ai_player:
+            try:
+                await self._play_ai_move(session, deadline)
+            except Exception:
+                session.undo()
+                raise
+        return session.get_state()
+
+    async def _play_ai_move(self, session: Session, deadline: float) -> None:
+        """Get the AI's move from the pool within the deadline and play it."""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), max(deadline - start, 0.0))
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RequestError("server busy")
+
+        future = loop.run_in_executor(self._pool, _ai_move, session.engine,
+                                      list(session.position.history))
+        # The slot is freed when the worker is done, even if the client gave up
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            col = await asyncio.wait_for(asyncio.shield(future),
+                                         max(deadline - time.perf_counter(), 0.0))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise RequestError("deadline exceeded")
+
+        self.ai_moves += 1
+        self.ai_latencies.append(time.perf_counter() - start)
+        session.play(col)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get throughput, latency percentiles (ms) and error counters."""
+        elapsed = time.perf_counter() - self.started
+        latency = {name: value * 1000 for name, value in percentiles(list(self.latencies)).items()}
+        ai_latency = {name: value * 1000 for name, value in percentiles(list(self.ai_latencies)).items()}
+        return {
+            'sessions': len(self.sessions),
+            'requests': self.requests,
+            'errors': self.errors,
+            'ai_moves': self.ai_moves,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'uptime': elapsed,
+            'requests_per_second': self.requests / elapsed if elapsed else 0.0,
+            'ai_moves_per_second': self.ai_moves / elapsed if elapsed else 0.0,
+            'latency_ms': latency,
+            'ai_latency_ms': ai_latency,
+        }
+
+
+class GameClient:
+    """Minimal asyncio client for the line protocol."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 8765) -> 'GameClient':
+        """Open a connection to a server."""
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, cmd: str, **fields: Any) -> Dict[str, Any]:
+        """Send one request and wait for its response."""
+        fields.update(cmd=cmd, id=next(self._ids))
+        self.writer.write(json.dumps(fields).encode() + b'\n')
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self) -> None:
+        """Close the connection."""
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_load(host: str, port: int, clients: int, games: int, engine: str,
+                   seed: int = 1) -> Dict[str, Any]:
+    """Play games against the server from many clients making random moves."""
+    latencies: List[float] = []
+    failures = 0
+
+    async def play(index: int) -> None:
+        nonlocal failures
+        rng = random.Random(seed * 1000003 + index)
+        client = await GameClient.connect(host, port)
+        try:
+            for _ in range(games):
+                state = await client.request('new', engine=engine)
+                session = state.get('session')
+                while state.get('ok') and not state['finished']:
+                    position = Position()
+                    for char in state['moves']:
+                        position.play(int(char) - 1)
+                    start = time.perf_counter()
+                    state = await client.request('move', session=session,
+                                                 column=rng.choice(position.playable_columns()))
+                    latencies.append(time.perf_counter() - start)
+                if not state.get('ok'):
+                    failures += 1
+                await client.request('close', session=session)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(index) for index in range(clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        'moves': len(latencies),
+        'failures': failures,
+        'time': elapsed,
+        'moves_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {name: value * 1000 for name, value in percentiles(latencies).items()},
+    }
+
+
+async def serve(args: argparse.Namespace) -> None:
+    """Run the server until interrupted, printing stats periodically."""
+    server = GameServer(args.workers, args.max_pending, args.deadline_ms, args.max_sessions)
+    listener = await server.start(args.host, args.port)
+    print(f"Serving on {args.host}:{args.port} with {args.workers} AI workers", flush=True)
+    try:
+        async with listener:
+            while True:
+                await asyncio.sleep(args.report_interval)
+                print(json.dumps(server.get_stats()), flush=True)
+    finally:
+        server.close()
+
+
+async def load(args: argparse.Namespace) -> None:
+    """Run the load generator and print client and server statistics."""
+    result = await run_load(args.host, args.port, args.clients, args.games, args.engine, args.seed)
+    client = await GameClient.connect(args.host, args.port)
+    stats = await client.request('stats')
+    await client.close()
+    print(json.dumps({'client': result, 'server': stats}, indent=2))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Host Connect Four sessions over TCP.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="run the server")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--workers', type=int, default=1, help="AI worker processes")
+    serve_parser.add_argument('--max-pending', type=int, help="AI moves queued or running at once")
+    serve_parser.add_argument('--deadline-ms', type=float, default=5000.0,
+                              help="default time limit of a request")
+    serve_parser.add_argument('--max-sessions', type=int, default=10000)
+    serve_parser.add_argument('--report-interval', type=float, default=10.0,
+                              help="seconds between stats lines")
+
+    load_parser = commands.add_parser('load', help="play random games against a server")
+    load_parser.add_argument('--host', default='127.0.0.1')
+    load_parser.add_argument('--port', type=int, default=8765)
+    load_parser.add_argument('--clients', type=int, default=10)
+    load_parser.add_argument('--games', type=int, default=1, help="games per client")
+    load_parser.add_argument('--engine', choices=list(ENGINE_PRESETS), default='medium')
+    load_parser.add_argument('--seed', type=int, default=1)
+
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args) if args.command == 'serve' else load(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
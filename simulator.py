@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Batch Game Simulator
+Plays thousands of independent games in lockstep as NumPy arrays.
+
+Every game keeps its two bitboards in uint64 arrays and all games make
+their n-th move together, so one step of the simulation is a handful of
+vectorized operations whatever the number of games.  Each side follows a
+move policy:
+
+    random   uniform over the playable columns
+    center   random, weighted towards the center columns
+    medium   win if possible, else block, else the most central column,
+             the same choice as ConnectFourGame's medium AI
+
+Usage:
+    python simulator.py --games 100000 --policies random medium
+"""
+
+import argparse
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from batch_evaluation import get_batch_evaluator
+
+POLICIES = ('random', 'center', 'medium')
+
+
+class GameSimulator:
+    """Lockstep simulator for many games on one board geometry."""
+
+    def __init__(self, rows: int = 6, cols: int = 7, seed: Optional[int] = None):
+        if np is None:
+            raise ImportError("The simulator needs NumPy; install it with 'pip install numpy'")
+        self.rows = rows
+        self.cols = cols
+        self.stride = rows + 1
+        if cols * self.stride > 64:
+            raise ValueError(f"A {rows}x{cols} board does not fit a 64-bit bitboard")
+        self.rng = np.random.default_rng(seed)
+        self._has_four = get_batch_evaluator(rows, cols).has_four_bitboards
+
+        self.column_masks = np.array([((1 << rows) - 1) << (col * self.stride)
+                                      for col in range(cols)], dtype=np.uint64)
+        self.bottom_mask = np.uint64(sum(1 << (col * self.stride) for col in range(cols)))
+        self.board_mask = np.uint64(sum(int(mask) for mask in self.column_masks))
+
+        # Columns by distance from the center, and sampling weights favoring it
+        center = (cols - 1) / 2
+        self.center_order = sorted(range(cols), key=lambda col: abs(col - center))
+        self.center_weights = np.log(np.array([center + 1 - abs(col - center)
+                                               for col in range(cols)]))
+
+    def _column_moves(self, mask):
+        """Get the move bit of every column of every game, 0 where the column is full."""
+        possible = (mask + self.bottom_mask) & self.board_mask
+        return possible[:, None] & self.column_masks[None, :]
+
+    def _sample(self, moves, log_weights=None):
+        """Sample one playable column per game, optionally weighted."""
+        keys = self.rng.gumbel(size=moves.shape)
+        if log_weights is not None:
+            keys += log_weights
+        keys[moves == 0] = -np.inf
+        return keys.argmax(axis=1)
+
+    def _winning_columns(self, bits, moves):
+        """Mark the columns whose move completes a four for ``bits``."""
+        completed = self._has_four(bits[:, None] | moves)
+        return completed & (moves != 0)
+
+    def _choose(self, policy: str, current, opponent, mask):
+        """Pick a column for every game with the given policy."""
+        moves = self._column_moves(mask)
+        if policy == 'random':
+            return self._sample(moves)
+        if policy == 'center':
+            return self._sample(moves, self.center_weights)
+        if policy != 'medium':
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {POLICIES}")
+
+        # Most central playable column, then blocks, then wins, as in _get_medium_ai_move
+        choice = np.full(len(mask), -1, dtype=np.intp)
+        for col in reversed(self.center_order):
+            choice[moves[:, col] != 0] = col
+        for bits in (opponent, current):
+            found = self._winning_columns(bits, moves)
+            for col in range(self.cols - 1, -1, -1):
+                choice[found[:, col]] = col
+        return choice
+
+    def play(self, games: int, policies: Sequence[str] = ('random', 'random'),
+             random_plies: int = 0) -> Dict[str, Any]:
+        """Play ``games`` games to the end with one policy per player.
+
+        The first ``random_plies`` moves of every game are random, which
+        keeps deterministic policies from replaying the same game.  Returns
+        the winner of every game (1, 2, or 0 for a draw), its length and its
+        moves as columns padded with -1.
+        """
+        start = time.perf_counter()
+        size = self.rows * self.cols
+        boards = [np.zeros(games, dtype=np.uint64), np.zeros(games, dtype=np.uint64)]
+        winners = np.zeros(games, dtype=np.int8)
+        lengths = np.full(games, size, dtype=np.int16)
+        history = np.full((games, size), -1, dtype=np.int8)
+        active = np.arange(games)
+
+        for ply in range(size):
+            if not len(active):
+                break
+            side = ply & 1
+            current, opponent = boards[side][active], boards[side ^ 1][active]
+            mask = current | opponent
+            policy = 'random' if ply < random_plies else policies[side]
+            columns = self._choose(policy, current, opponent, mask)
+
+            move = ((mask + self.bottom_mask) & self.board_mask) & self.column_masks[columns]
+            current |= move
+            boards[side][active] = current
+            history[active, ply] = columns
+
+            won = self._has_four(current)
+            finished = active[won]
+            winners[finished] = side + 1
+            lengths[finished] = ply + 1
+            active = active[~won]
+
+        elapsed = time.perf_counter() - start
+        total_moves = int(lengths.sum())
+        return {
+            'winners': winners,
+            'lengths': lengths,
+            'moves': history,
+            'games': games,
+            'total_moves': total_moves,
+            'time': elapsed,
+            'moves_per_second': total_moves / elapsed if elapsed else 0.0,
+        }
+
+
+def summarize(result: Dict[str, Any]) -> Dict[str, float]:
+    """Get the win rate of each player, the draw rate and the mean game length."""
+    winners = result['winners']
+    games = max(len(winners), 1)
+    return {
+        'first_wins': float(np.count_nonzero(winners == 1)) / games,
+        'second_wins': float(np.count_nonzero(winners == 2)) / games,
+        'draws': float(np.count_nonzero(winners == 0)) / games,
+        'mean_length': float(result['lengths'].mean()) if len(winners) else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Simulate many Connect Four games at once.")
+    parser.add_argument('--games', type=int, default=10000, help="games to play")
+    parser.add_argument('--policies', nargs=2, default=['random', 'random'], choices=POLICIES,
+                        metavar='POLICY', help="policies of the first and second player")
+    parser.add_argument('--random-plies', type=int, default=0, help="random opening plies per game")
+    parser.add_argument('--seed', type=int, help="random seed")
+    args = parser.parse_args(argv)
+
+    simulator = GameSimulator(seed=args.seed)
+    result = simulator.play(args.games, args.policies, args.random_plies)
+    summary = summarize(result)
+    print(f"{args.policies[0]} vs {args.policies[1]}: "
+          f"{summary['first_wins']:.1%} first, {summary['second_wins']:.1%} second, "
+          f"{summary['draws']:.1%} draws, {summary['mean_length']:.1f} moves per game")
+    print(f"{result['total_moves']} moves in {result['time']:.2f}s "
+          f"({result['moves_per_second']:.0f} moves/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Perfect-Play Solver
+Exact game-theoretic solver: negamax over bitboards with null-window
+searches, a transposition table and threat-based move ordering.
+
+Scores follow the usual convention for the side to move: 0 is a draw, a
+positive score is a win and a negative score is a loss, and the larger its
+magnitude the sooner the game is decided (one point per stone the winner
+still has in hand when the four is completed).
+"""
+
+from typing import Any, Dict, List, Optional
+
+from bitboard import Position, canonical_key, winning_cells
+from search import SearchTimeout
+from transposition import TranspositionTable, LOWER, UPPER
+
+
+class Solver:
+    """Negamax solver that keeps its transposition table between calls."""
+
+    def __init__(self, table: Optional[TranspositionTable] = None):
+        self.table = table if table is not None else TranspositionTable(
+            max_bytes=64 * 1024 * 1024, replacement='always', bucket_size=1)
+        self.nodes = 0
+        self._geometry = None
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """Stop the running or next solve or analyze call; it raises SearchTimeout.
+        The cancel holds until clear_cancel() is called."""
+        self._cancelled = True
+
+    def clear_cancel(self) -> None:
+        """Let solves run again after a cancel; call before scheduling one."""
+        self._cancelled = False
+
+    def _setup(self, position: Position) -> None:
+        """Cache the masks of the position's board geometry."""
+        geometry = (position.rows, position.cols)
+        if geometry == self._geometry:
+            return
+        self._geometry = geometry
+        self.table.clear()
+        self.size = position.rows * position.cols
+        self.cols = position.cols
+        self.stride = position.stride
+        self.bottom_mask = position.bottom_mask
+        self.board_mask = position.board_mask
+        center = (position.cols - 1) / 2
+        order = sorted(range(position.cols), key=lambda col: abs(col - center))
+        self.ordered_masks = [position.column_masks[col] for col in order]
+
+    def solve(self, position: Position) -> Dict[str, Any]:
+        """Solve a position that is not already won.
+
+        Returns the exact score for the side to move, the game value
+        (1 win, 0 draw, -1 loss) and the distance to the result in plies.
+        """
+        if position.is_win(1) or position.is_win(2):
+            raise ValueError("Cannot solve a position that is already won")
+        self._setup(position)
+        start_nodes = self.nodes
+
+        current = position.boards[position.moves & 1]
+        mask = position.mask
+        score = self._solve(current, mask, position.moves)
+        return self._result(score, position.moves, self.nodes - start_nodes)
+
+    def analyze(self, position: Position) -> Dict[str, Any]:
+        """Solve every playable column and return the best one with its result."""
+        if position.is_win(1) or position.is_win(2):
+            raise ValueError("Cannot solve a position that is already won")
+        self._setup(position)
+        start_nodes = self.nodes
+
+        current = position.boards[position.moves & 1]
+        mask = position.mask
+        moves = position.moves
+        possible = (mask + self.bottom_mask) & self.board_mask
+        win_now = winning_cells(current, mask, self.stride, self.board_mask) & possible
+
+        scores: Dict[int, int] = {}
+        center = (position.cols - 1) / 2
+        for col in sorted(position.playable_columns(), key=lambda c: abs(c - center)):
+            move = possible & position.column_masks[col]
+            if move & win_now:
+                scores[col] = (self.size + 1 - moves) // 2
+            elif moves + 1 == self.size:
+                scores[col] = 0
+            else:
+                scores[col] = -self._solve(current ^ mask, mask | move, moves + 1)
+
+        best_column = max(scores, key=lambda col: scores[col])
+        result = self._result(scores[best_column], moves, self.nodes - start_nodes)
+        result['column'] = best_column
+        result['scores'] = scores
+        return result
+
+    def _result(self, score: int, moves: int, nodes: int) -> Dict[str, Any]:
+        """Turn a score into the game value and the distance to the result."""
+        if score == 0:
+            value, distance = 0, self.size - moves
+        else:
+            # The winner completes its four after 44 - moves - 2|score| plies
+            # or one ply later; the winner's parity picks which.
+            distance = self.size + 2 - moves - 2 * abs(score)
+            value = 1 if score > 0 else -1
+            if (distance % 2 == 1) != (value == 1):
+                distance -= 1
+        return {'score': score, 'value': value, 'distance': distance, 'nodes': nodes}
+
+    def _solve(self, current: int, mask: int, moves: int) -> int:
+        """Narrow the score window with null-window searches until it closes."""
+        size = self.size
+        possible = (mask + self.bottom_mask) & self.board_mask
+        if winning_cells(current, mask, self.stride, self.board_mask) & possible:
+            return (size + 1 - moves) // 2
+
+        low = -((size - moves) // 2)
+        high = (size + 1 - moves) // 2
+        while low < high:
+            middle = low + (high - low) // 2
+            if middle <= 0 and int(low / 2) < middle:
+                middle = int(low / 2)
+            elif middle >= 0 and int(high / 2) > middle:
+                middle = int(high / 2)
+            result = self._negamax(current, mask, moves, middle, middle + 1)
+            if result <= middle:
+                high = result
+            else:
+                low = result
+        return low
+
+    def _negamax(self, current: int, mask: int, moves: int, alpha: int, beta: int) -> int:
+        """Negamax alpha-beta search; the side to move cannot win at once."""
+        self.nodes += 1
+        if self._cancelled:
+            raise SearchTimeout()
+        size, stride, board_mask = self.size, self.stride, self.board_mask
+
+        possible = (mask + self.bottom_mask) & board_mask
+        opponent = current ^ mask
+        opponent_wins = winning_cells(opponent, mask, stride, board_mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return -((size - moves) // 2)  # two threats cannot both be blocked
+            possible = forced
+        # Never play directly below an opponent's winning cell
+        non_losing = possible & ~(opponent_wins >> 1)
+        if not non_losing:
+            return -((size - moves) // 2)
+
+        if moves >= size - 2:
+            return 0
+
+        # Bounds from the remaining stones, tightened by the table
+        low = -((size - 2 - moves) // 2)
+        high = (size - 1 - moves) // 2
+        table = self.table
+        key = canonical_key(current + mask, self.cols, stride)[0]
+        entry = table.probe(key)
+        if entry is not None:
+            stored, bound = entry[1], entry[2]
+            if bound == UPPER:
+                high = min(high, stored)
+            elif bound == LOWER:
+                low = max(low, stored)
+        if low >= beta:
+            return low
+        if high <= alpha:
+            return high
+        alpha = max(alpha, low)
+        beta = min(beta, high)
+
+        # Try moves that create the most new threats first, center first on ties
+        candidates: List = []
+        for rank, column_mask in enumerate(self.ordered_masks):
+            move = non_losing & column_mask
+            if move:
+                threats = winning_cells(current | move, mask | move, stride, board_mask)
+                candidates.append((-bin(threats).count('1'), rank, move))
+        candidates.sort()
+
+        for _, _, move in candidates:
+            score = -self._negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                table.store(key, 0, score, LOWER, -1)
+                return score
+            if score > alpha:
+                alpha = score
+
+        table.store(key, 0, alpha, UPPER, -1)
+        return alpha
+
+
+_default_solver: Optional[Solver] = None
+
+
+def _get_default_solver() -> Solver:
+    """Get the solver shared by solve() and best_move()."""
+    global _default_solver
+    if _default_solver is None:
+        _default_solver = Solver()
+    return _default_solver
+
+
+def solve(position: Position) -> Dict[str, Any]:
+    """Solve a position exactly; see Solver.solve."""
+    return _get_default_solver().solve(position)
+
+
+def best_move(position: Position) -> Dict[str, Any]:
+    """Find the best column of a position by solving every move; see Solver.analyze."""
+    return _get_default_solver().analyze(position)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Statistics Log
+Append-only record of finished games with lazily computed totals.
+
+Each finished game appends one JSON line to the log, so saving a game
+costs one small write and concurrent games never overwrite each other.
+The totals live in a snapshot file (the old stats.json) that the log is
+folded into every so often: the log is first renamed aside with a unique
+name, the new snapshot lists every renamed log it has counted and
+replaces the old one atomically, and only then are those logs deleted.
+Loading skips the logs the snapshot lists, so a crash at any point counts
+each record once.  Compaction holds an exclusive lock on a lock file next
+to the log and appends hold a shared one, so no process appends to a log
+another is folding, and two processes never compact at the same time.
+
+Every log starts with a header line naming it with a unique id, and a
+reader that finds a different id (or no log) knows the log it was reading
+was compacted away, whatever inode the new one landed on.
+
+Records can also be buffered in memory and written in batches; buffered
+games count towards the totals straight away and reach the log once the
+buffer is full, ``flush_interval`` seconds after the first of them, or
+when the log is closed or the process exits.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_STATS = {
+    'games_played': 0,
+    'player1_wins': 0,
+    'player2_wins': 0,
+    'draws': 0,
+    'best_time': None,
+    'total_moves': 0,
+    'win_streak': 0,
+    'longest_streak': 0,
+}
+
+
+def fold_game(stats: Dict[str, Any], record: Dict[str, Any]) -> None:
+    """Add one game record (winner 0/1/2, moves, time) to the totals."""
+    stats['games_played'] += 1
+    stats['total_moves'] += record.get('moves', 0)
+
+    winner = record.get('winner')
+    if winner == 1:
+        stats['player1_wins'] += 1
+        stats['win_streak'] += 1
+        stats['longest_streak'] = max(stats['longest_streak'], stats['win_streak'])
+    elif winner == 2:
+        stats['player2_wins'] += 1
+        stats['win_streak'] = 0
+    else:
+        stats['draws'] += 1
+        stats['win_streak'] = 0
+
+    game_time = record.get('time')
+    if game_time is not None and (not stats['best_time'] or game_time < stats['best_time']):
+        stats['best_time'] = game_time
+
+
+class StatsLog:
+    """Game statistics kept as a snapshot plus an append-only log."""
+
+    def __init__(self, snapshot_path: str = 'stats.json', log_path: str = 'stats.log',
+                 buffer_size: int = 0, flush_interval: float = 5.0,
+                 compact_every: int = 200):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.lock_path = log_path + '.lock'
+
+        self._buffer: List[str] = []
+        self._buffered: List[Dict[str, Any]] = []
+        self._buffer_started = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._mutex = threading.RLock()  # the flush timer runs on its own thread
+        self._stats: Optional[Dict[str, Any]] = None  # snapshot plus the log read so far
+        self._log_id: Optional[str] = None
+        self._offset = 0
+        self._log_records = 0
+        if buffer_size:
+            atexit.register(self.close)
+
+    def record(self, record: Dict[str, Any]) -> None:
+        """Log a finished game, buffered or written straight away."""
+        with self._mutex:
+            self._buffer.append(json.dumps(record) + '\n')
+            self._buffered.append(record)
+            if len(self._buffer) == 1:
+                self._buffer_started = time.monotonic()
+            if (len(self._buffer) >= max(self.buffer_size, 1)
+                    or time.monotonic() - self._buffer_started >= self.flush_interval):
+                self.flush()
+            elif self._flush_timer is None:
+                # Write the buffer out even if no further game comes
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Append the buffered games to the log in one write."""
+        with self._mutex:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._buffer:
+                return
+            data = ''.join(self._buffer).encode()
+            try:
+                with self._lock(exclusive=False), open(self.log_path, 'a+b') as f:
+                    end = f.seek(0, os.SEEK_END)
+                    if not end:
+                        data = self._header() + data
+                    else:
+                        # Finish a line torn by a crash so it does not swallow ours
+                        f.seek(end - 1)
+                        if f.read(1) != b'\n':
+                            data = b'\n' + data
+                    f.write(data)
+            except OSError:
+                return  # keep the records buffered and try again next time
+            self._buffer = []
+            self._buffered = []
+            self._refresh()
+            if self.compact_every and self._log_records >= self.compact_every:
+                self.compact()
+
+    def close(self) -> None:
+        """Write out any buffered games and stop the flush timer."""
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the totals, reading only what was logged since the last call."""
+        with self._mutex:
+            self._refresh()
+            if not self._buffered:
+                return self._stats
+            stats = dict(self._stats)
+            for record in self._buffered:
+                fold_game(stats, record)
+            return stats
+
+    @staticmethod
+    def _header() -> bytes:
+        """Get the first line of a new log, naming it with a unique id."""
+        return (json.dumps({'log': uuid.uuid4().hex}) + '\n').encode()
+
+    def _log_status(self) -> Tuple[Optional[str], int]:
+        """Get the id in the log's header (None without one) and the log's size."""
+        try:
+            with open(self.log_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                first = f.readline(256)
+        except OSError:
+            return None, 0
+        try:
+            header = json.loads(first)
+        except ValueError:
+            return None, size
+        return (header.get('log') if isinstance(header, dict) else None), size
+
+    def _refresh(self) -> None:
+        """Catch up with the snapshot and the log as they are on disk."""
+        log_id, size = self._log_status()
+        if self._stats is None or log_id != self._log_id or size < self._offset:
+            # First read, or the log was compacted away: start from the snapshot
+            self._stats = self._load_snapshot()
+            self._log_id, self._offset, self._log_records = log_id, 0, 0
+        if size > self._offset:
+            records, consumed = self._read_log(self.log_path, self._offset)
+            for record in records:
+                fold_game(self._stats, record)
+            self._offset += consumed
+            self._log_records += len(records)
+
+    @contextmanager
+    def _lock(self, exclusive: bool) -> Iterator[None]:
+        """Hold the lock file, shared by appends and exclusive for compaction."""
+        with open(self.lock_path, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            else:  # pragma: no cover - Windows has no shared locks
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:  # pragma: no cover
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _load_snapshot(self) -> Dict[str, Any]:
+        """Load the snapshot totals, folding in logs left over by an interrupted compaction."""
+        stats = dict(DEFAULT_STATS)
+        folded: List[str] = []
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                saved = json.load(f)
+            folded = saved.pop('folded_logs', [])
+            token = saved.pop('log_token', None)  # snapshots of older versions
+            if token is not None:
+                folded.append(f"{os.path.basename(self.log_path)}.compacting.{token}")
+            stats.update(saved)
+        except (OSError, ValueError):
+            pass
+
+        for leftover in self._compacting_logs():
+            if os.path.basename(leftover) not in folded:
+                for record in self._read_log(leftover, 0)[0]:
+                    fold_game(stats, record)
+        return stats
+
+    def _compacting_logs(self) -> List[str]:
+        """List logs renamed aside by compactions that may not have finished."""
+        directory, name = os.path.split(os.path.abspath(self.log_path))
+        try:
+            return sorted(os.path.join(directory, entry) for entry in os.listdir(directory)
+                          if entry.startswith(name + '.compacting.'))
+        except OSError:
+            return []
+
+    @staticmethod
+    def _read_log(path: str, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Read the complete lines of a log from an offset: (records, bytes consumed)."""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return [], 0
+        end = data.rfind(b'\n') + 1  # a torn last line is read once it is finished
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # skip lines garbled by a crash
+            if isinstance(record, dict) and 'log' not in record:  # skip headers
+                records.append(record)
+        return records, end
+
+    def compact(self) -> None:
+        """Fold the log into the snapshot and start an empty log."""
+        with self._mutex:
+            self.flush()
+            try:
+                with self._lock(exclusive=True):
+                    self._compact()
+            except OSError:
+                pass  # the log is folded in by a later compaction
+            self._stats = None
+
+    def _compact(self) -> None:
+        """Fold the log and any leftovers into a new snapshot (lock held)."""
+        compacting = f"{self.log_path}.compacting.{uuid.uuid4().hex}"
+        stats = self._load_snapshot()
+        try:
+            os.replace(self.log_path, compacting)
+        except OSError:
+            compacting = None  # no log to fold
+        if compacting is not None:
+            for record in self._read_log(compacting, 0)[0]:
+                fold_game(stats, record)
+
+        # Every renamed log now on disk is counted in ``stats``
+        leftovers = self._compacting_logs()
+        folded = [os.path.basename(leftover) for leftover in leftovers]
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(dict(stats, folded_logs=folded), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        for leftover in leftovers:
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
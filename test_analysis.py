@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Game Analysis Tests
+Runs the analysis pipeline over a small archive of random games.
+
+Run with:
+    python -m pytest test_analysis.py
+"""
+
+import random
+
+from analysis import analyze_archive
+from bitboard import Position
+from game_records import write_records
+
+
+def random_games(count, seed):
+    """Play random games to the end and yield their records."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        position = Position()
+        moves, winner = [], None
+        while winner is None:
+            player = position.current_player
+            col = rng.choice(position.playable_columns())
+            position.play(col)
+            moves.append(col)
+            if position.is_win(player):
+                winner = player
+            elif position.moves == position.rows * position.cols:
+                winner = 0
+        yield {'moves': moves, 'winner': winner}
+
+
+def test_output_does_not_depend_on_workers_or_batches(tmp_path):
+    archive = str(tmp_path / 'games.c4r')
+    write_records(archive, random_games(12, 5))
+
+    outputs = []
+    for workers, batch in ((1, 64), (1, 1), (3, 4)):
+        output = str(tmp_path / f'annotated-{workers}-{batch}.jsonl')
+        stats = analyze_archive(archive, output, depth=6, solver_threshold=0,
+                                workers=workers, batch_games=batch)
+        assert stats['games'] == 12
+        with open(output, 'rb') as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+def test_resume_matches_a_full_run(tmp_path):
+    archive = str(tmp_path / 'games.c4r')
+    write_records(archive, random_games(12, 7))
+
+    full = str(tmp_path / 'full.jsonl')
+    analyze_archive(archive, full, depth=5, batch_games=4)
+
+    # Stop after the first batch, then resume
+    partial = str(tmp_path / 'partial.jsonl')
+
+    def interrupt(stats):
+        raise KeyboardInterrupt
+
+    try:
+        analyze_archive(archive, partial, depth=5, batch_games=4, progress=interrupt)
+    except KeyboardInterrupt:
+        pass
+    stats = analyze_archive(archive, partial, depth=5, batch_games=4, resume=True)
+    assert stats['games'] == 8 and stats['total_games'] == 12
+
+    with open(full, 'rb') as f, open(partial, 'rb') as g:
+        assert f.read() == g.read()
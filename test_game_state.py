@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Game State Tests
+Snapshots, restore, undo and redo of ConnectFourGame.
+
+Run with:
+    python -m pytest test_game_state.py
+"""
+
+from connect_four_game import ConnectFourGame
+from game_state import GameState
+
+
+def play(game, columns):
+    """Drop pieces in the given columns."""
+    for col in columns:
+        assert game.drop_piece(col)
+
+
+def test_snapshot_round_trip():
+    game = ConnectFourGame()
+    game.start_game()
+    play(game, [3, 3, 2])
+    state = game.snapshot()
+    assert state == GameState.initial().play(3).play(3).play(2)
+
+    play(game, [4, 1])
+    game.restore(state)
+    assert game.snapshot() == state
+    assert game.board == state.to_board() and game.current_player == 2
+
+
+def test_undo_and_redo_do_not_recount_a_win():
+    game = ConnectFourGame()
+    game.start_game()
+    play(game, [0, 1, 0, 1, 0, 1, 0])
+    assert game.winner == 1 and game.session_stats['games_played'] == 1
+
+    assert game.undo_move() and game.game_state == 'playing'
+    assert game.redo_move() and game.winner == 1
+    assert game.session_stats['games_played'] == 1
+
+
+def test_restoring_an_unfinished_state_counts_the_next_result():
+    game = ConnectFourGame()
+    game.start_game()
+    play(game, [0, 1, 0, 1, 0, 1, 0])
+    assert game.session_stats['games_played'] == 1
+
+    game.restore(GameState.initial())
+    assert game.game_state == 'playing'
+    play(game, [6, 5, 6, 5, 6, 5, 6])
+    assert game.winner == 1
+    assert game.session_stats['games_played'] == 2
+    assert game.session_stats['player1_wins'] == 2
+
+    # Restoring the finished game itself does not count it again
+    game.restore(game.snapshot())
+    assert game.session_stats['games_played'] == 2
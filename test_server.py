@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Game Server Tests
+Drives a GameServer on an ephemeral port through GameClient.
+
+Run with:
+    python -m pytest test_server.py
+"""
+
+import asyncio
+
+from server import GameClient, GameServer, percentiles
+
+
+def run_with_server(scenario, **options):
+    """Start a server on a free port, run ``scenario(server, client)`` against it, and stop it."""
+    async def main():
+        server = GameServer(**options)
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        client = await GameClient.connect('127.0.0.1', port)
+        try:
+            return await scenario(server, client)
+        finally:
+            await client.close()
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_new_session_and_move():
+    async def scenario(server, client):
+        state = await client.request('new', engine='medium')
+        assert state['ok'] and state['moves'] == '' and state['to_move'] == 1
+
+        state = await client.request('move', session=state['session'], column=3)
+        assert state['ok']
+        assert len(state['moves']) == 2 and state['moves'][0] == '4'
+        assert state['to_move'] == 1
+
+        again = await client.request('state', session=state['session'])
+        assert again['moves'] == state['moves']
+
+    run_with_server(scenario)
+
+
+def test_ai_opens_when_it_plays_first():
+    async def scenario(server, client):
+        state = await client.request('new', engine='medium', ai_player=1)
+        assert state['ok'] and len(state['moves']) == 1 and state['to_move'] == 2
+
+    run_with_server(scenario)
+
+
+def test_ai_request_only_on_the_ai_turn():
+    async def scenario(server, client):
+        state = await client.request('new', engine='medium', ai_player=0)
+        response = await client.request('ai', session=state['session'])
+        assert not response['ok'] and 'no AI player' in response['error']
+
+        state = await client.request('new', engine='medium', ai_player=2)
+        response = await client.request('ai', session=state['session'])
+        assert not response['ok'] and "not the AI's turn" in response['error']
+        assert (await client.request('state', session=state['session']))['moves'] == ''
+
+    run_with_server(scenario)
+
+
+def test_only_preset_engines():
+    async def scenario(server, client):
+        for engine in ('hard:tt_max_bytes=-1', 'hard:search_workers=2', 'medium:', 'expert', 3):
+            response = await client.request('new', engine=engine)
+            assert not response['ok'] and 'unknown engine' in response['error']
+        assert len(server.sessions) == 0
+
+        state = await client.request('new', engine='hard', ai_player=1)
+        assert state['ok'] and len(state['moves']) == 1
+
+    run_with_server(scenario)
+
+
+def test_wrong_turn_and_invalid_columns():
+    async def scenario(server, client):
+        state = await client.request('new', engine='medium', ai_player=0)
+        session = state['session']
+        for column in (7, -1, 'a', True, None):
+            response = await client.request('move', session=session, column=column)
+            assert not response['ok'] and response['error'] == 'invalid column'
+
+        state = await client.request('new', engine='medium', ai_player=1)
+        response = await client.request('move', session=state['session'], column=3)
+        assert response['ok']
+
+        response = await client.request('move', session='missing', column=3)
+        assert not response['ok'] and response['error'] == 'unknown session'
+
+    run_with_server(scenario)
+
+
+def test_busy_server_rolls_back_the_move():
+    async def scenario(server, client):
+        state = await client.request('new', engine='medium')
+        session = state['session']
+
+        # Take the only pool slot so the AI's answer cannot be scheduled
+        await server._slots.acquire()
+        try:
+            response = await client.request('move', session=session, column=3, deadline_ms=50)
+            assert not response['ok'] and response['error'] == 'server busy'
+            assert (await client.request('state', session=session))['moves'] == ''
+
+            sessions = len(server.sessions)
+            response = await client.request('new', engine='medium', ai_player=1, deadline_ms=50)
+            assert not response['ok'] and response['error'] == 'server busy'
+            assert len(server.sessions) == sessions
+        finally:
+            server._slots.release()
+
+        response = await client.request('move', session=session, column=3)
+        assert response['ok'] and len(response['moves']) == 2
+
+        stats = await client.request('stats')
+        assert stats['rejected'] == 2 and stats['sessions'] == 1
+
+    run_with_server(scenario, max_pending=1)
+
+
+def test_failed_ai_move_rolls_back_and_keeps_the_connection():
+    async def scenario(server, client):
+        state = await client.request('new', engine='medium')
+        session = state['session']
+
+        async def broken(session, deadline):
+            raise RuntimeError("worker died")
+
+        play_ai_move = server._play_ai_move
+        server._play_ai_move = broken
+        response = await client.request('move', session=session, column=3)
+        assert not response['ok'] and response['error'] == 'internal error: RuntimeError'
+        assert (await client.request('state', session=session))['moves'] == ''
+
+        server._play_ai_move = play_ai_move
+        response = await client.request('move', session=session, column=3)
+        assert response['ok'] and len(response['moves']) == 2
+
+    run_with_server(scenario)
+
+
+def test_finished_game_refuses_moves():
+    async def scenario(server, client):
+        state = await client.request('new', engine='medium', ai_player=0)
+        session = state['session']
+        for column in (0, 1, 0, 1, 0, 1, 0):
+            state = await client.request('move', session=session, column=column)
+        assert state['finished'] and state['winner'] == 1
+
+        response = await client.request('move', session=session, column=2)
+        assert not response['ok'] and response['error'] == 'game is over'
+
+        response = await client.request('close', session=session)
+        assert response['closed']
+        assert (await client.request('stats'))['sessions'] == 0
+
+    run_with_server(scenario)
+
+
+def test_nearest_rank_percentiles():
+    values = list(range(1, 11))
+    assert percentiles(values, (10, 50, 90, 99, 100)) == {
+        'p10': 1, 'p50': 5, 'p90': 9, 'p99': 10, 'p100': 10}
+    assert percentiles([7.0], (0, 50)) == {'p0': 7.0, 'p50': 7.0}
+    assert percentiles([]) == {'p50': 0.0, 'p90': 0.0, 'p99': 0.0}
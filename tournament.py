@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Self-Play Tournament
+Headless engine-vs-engine matches run across a process pool.
+
+Every pair of engines plays the requested number of games, alternating who
+moves first, each game starting from a few random opening plies.  Results
+stream out as JSON lines while the games run, followed by win/draw/loss
+tables, Elo estimates and throughput.
+
+Engines are AI difficulties, optionally with setting overrides:
+    python tournament.py easy medium hard --games 100 --workers 4
+    python tournament.py medium hard:search_depth=6 hard:search_time_ms=50
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bitboard import Position
+from connect_four_game import ConnectFourGame
+from game_records import GameRecordWriter
+
+# Engine instances of this process, by spec
+_engines: Dict[str, ConnectFourGame] = {}
+
+
+def parse_engine(spec: str) -> Tuple[str, Dict[str, Any]]:
+    """Split an engine spec like ``hard:search_depth=6`` into difficulty and settings."""
+    difficulty, _, options = spec.partition(':')
+    overrides: Dict[str, Any] = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return difficulty, overrides
+
+
+def _get_engine(spec: str) -> ConnectFourGame:
+    """Get this process's engine for a spec, creating it on first use."""
+    engine = _engines.get(spec)
+    if engine is None:
+        difficulty, overrides = parse_engine(spec)
+        engine = ConnectFourGame()
+        engine.settings['ai_difficulty'] = difficulty
+        engine.settings.update(overrides)
+        _engines[spec] = engine
+    return engine
+
+
+def play_game(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Play one game between two engine specs and return its record."""
+    random.seed(task['seed'])
+    specs = (task['first'], task['second'])
+    engines = [_get_engine(spec) for spec in specs]
+    for engine in engines:
+        engine.reset_game()
+
+    start = time.perf_counter()
+    position = Position()
+    winner = 0
+    while position.moves < position.rows * position.cols:
+        mover = position.moves & 1
+        if position.moves < task['random_plies']:
+            col = random.choice(position.playable_columns())
+        else:
+            col = engines[mover].choose_move(position)
+        position.play(col)
+        if position.is_win(mover + 1):
+            winner = mover + 1
+            break
+
+    return {
+        'game': task['game'],
+        'first': specs[0],
+        'second': specs[1],
+        'winner': winner,  # 1 = first, 2 = second, 0 = draw
+        'moves': ''.join(str(col + 1) for col in position.history),
+        'time': time.perf_counter() - start,
+    }
+
+
+def make_tasks(specs: List[str], games: int, random_plies: int, seed: int) -> List[Dict[str, Any]]:
+    """Schedule ``games`` games for every pair of engines, alternating colors."""
+    duplicates = sorted({spec for spec in specs if specs.count(spec) > 1})
+    if duplicates:
+        raise ValueError(f"engine specs given more than once: {', '.join(duplicates)}")
+    tasks = []
+    for a, b in combinations(specs, 2):
+        for i in range(games):
+            first, second = (a, b) if i % 2 == 0 else (b, a)
+            tasks.append({'game': len(tasks), 'first': first, 'second': second,
+                          'random_plies': random_plies, 'seed': seed * 1000003 + len(tasks)})
+    return tasks
+
+
+def run_games(tasks: List[Dict[str, Any]], workers: int) -> Iterator[Dict[str, Any]]:
+    """Play the tasks, yielding game records as they finish."""
+    if workers <= 1:
+        for task in tasks:
+            yield play_game(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_game, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def score_table(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, List[int]]]:
+    """Tabulate [wins, draws, losses] of each engine against each opponent."""
+    table: Dict[str, Dict[str, List[int]]] = {}
+    for result in results:
+        first, second = result['first'], result['second']
+        for engine, opponent, side in ((first, second, 1), (second, first, 2)):
+            row = table.setdefault(engine, {}).setdefault(opponent, [0, 0, 0])
+            if result['winner'] == 0:
+                row[1] += 1
+            elif result['winner'] == side:
+                row[0] += 1
+            else:
+                row[2] += 1
+    return table
+
+
+def estimate_elo(results: List[Dict[str, Any]], iterations: int = 50) -> Dict[str, float]:
+    """Fit Elo ratings to the results, centered on zero.
+
+    Each pairing gets one virtual draw so that perfect scores stay finite.
+    """
+    table = score_table(results)
+    engines = sorted(table)
+    ratings = {engine: 0.0 for engine in engines}
+    for _ in range(iterations):
+        for engine in engines:
+            # One Newton step on this engine's rating, the others held fixed
+            actual = expected = slope = 0.0
+            for opponent, (wins, draws, losses) in table[engine].items():
+                games = wins + draws + losses + 1
+                p = 1 / (1 + 10 ** ((ratings[opponent] - ratings[engine]) / 400))
+                actual += wins + 0.5 * (draws + 1)
+                expected += games * p
+                slope += games * p * (1 - p) * math.log(10) / 400
+            ratings[engine] += (actual - expected) / slope
+        mean = sum(ratings.values()) / len(ratings)
+        ratings = {engine: rating - mean for engine, rating in ratings.items()}
+    return ratings
+
+
+def format_summary(results: List[Dict[str, Any]], elapsed: float) -> str:
+    """Render the win/draw/loss tables, Elo estimates and throughput."""
+    table = score_table(results)
+    ratings = estimate_elo(results)
+    width = max([len(engine) for engine in table] + [6])
+    lines = ["", "Results (W-D-L, row vs column)"]
+    engines = sorted(table, key=lambda engine: -ratings[engine])
+    lines.append(" " * width + "  " + "  ".join(f"{engine:>{width}}" for engine in engines))
+    for engine in engines:
+        cells = []
+        for opponent in engines:
+            if opponent == engine:
+                cells.append(f"{'-':>{width}}")
+            else:
+                wins, draws, losses = table[engine].get(opponent, [0, 0, 0])
+                cells.append(f"{f'{wins}-{draws}-{losses}':>{width}}")
+        lines.append(f"{engine:>{width}}  " + "  ".join(cells))
+
+    lines.append("")
+    lines.append("Elo estimates")
+    for engine in engines:
+        wins = sum(row[0] for row in table[engine].values())
+        draws = sum(row[1] for row in table[engine].values())
+        losses = sum(row[2] for row in table[engine].values())
+        lines.append(f"{engine:>{width}}  {ratings[engine]:+7.1f}   ({wins}-{draws}-{losses})")
+
+    lines.append("")
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    lines.append(f"{len(results)} games in {elapsed:.1f}s ({rate:.2f} games/s)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Run a headless Connect Four engine tournament.")
+    parser.add_argument('engines', nargs='+', help="engine specs, e.g. easy medium hard:search_depth=6")
+    parser.add_argument('--games', type=int, default=10, help="games per pairing")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes")
+    parser.add_argument('--random-plies', type=int, default=2, help="random opening plies per game")
+    parser.add_argument('--seed', type=int, default=1, help="seed for openings and random engines")
+    parser.add_argument('--output', help="also append game records to this JSON lines file")
+    parser.add_argument('--archive', help="also append the games to this binary game record file")
+    parser.add_argument('--quiet', action='store_true', help="do not stream game records to stdout")
+    args = parser.parse_args(argv)
+
+    if len(set(args.engines)) < 2:
+        parser.error("need at least two different engines")
+    try:
+        tasks = make_tasks(args.engines, args.games, args.random_plies, args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+    results = []
+    output = open(args.output, 'a') if args.output else None
+    archive = GameRecordWriter(args.archive, append=True) if args.archive else None
+    start = time.perf_counter()
+    try:
+        for result in run_games(tasks, args.workers):
+            results.append(result)
+            line = json.dumps(result)
+            if output:
+                output.write(line + "\n")
+                output.flush()
+            if archive:
+                archive.write([int(col) - 1 for col in result['moves']], result['winner'])
+            if not args.quiet:
+                print(line, flush=True)
+    finally:
+        if output:
+            output.close()
+        if archive:
+            archive.close()
+
+    print(format_summary(results, time.perf_counter() - start))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
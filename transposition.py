@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Transposition Table
+Bounded-memory cache of search results keyed by position key.
+
+The table is a fixed number of buckets stored in flat parallel lists, so its
+size never grows past the slot count chosen at construction time.
+"""
+
+from typing import Dict, Optional, Tuple
+
+# Bound types of a stored score
+EXACT = 0
+LOWER = 1  # score is a lower bound (fail high)
+UPPER = 2  # score is an upper bound (fail low)
+
+REPLACEMENT_POLICIES = ('depth', 'always')
+
+Entry = Tuple[int, float, int, int]  # depth, score, bound, best move
+
+# Fibonacci hashing spreads the structured bitboard keys across buckets.
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_HASH_MASK = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """Fixed-size transposition table with bucketed replacement."""
+
+    # Rough cost of one slot: five list references plus the boxed key and score.
+    ENTRY_BYTES = 5 * 8 + 36 + 24
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, replacement: str = 'depth',
+                 bucket_size: int = 2):
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+        if bucket_size < 1:
+            raise ValueError("bucket_size must be at least 1")
+
+        self.replacement = replacement
+        self.bucket_size = bucket_size
+        self.num_buckets = max(1, max_bytes // (self.ENTRY_BYTES * bucket_size))
+        self.capacity = self.num_buckets * bucket_size
+
+        self.keys = [None] * self.capacity
+        self.depths = [0] * self.capacity
+        self.scores = [0] * self.capacity
+        self.bounds = [EXACT] * self.capacity
+        self.moves = [-1] * self.capacity
+
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        """Reset the hit, miss and collision counters."""
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+        self.rejected = 0
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        self.keys = [None] * self.capacity
+        self.reset_counters()
+
+    def _bucket_start(self, key: int) -> int:
+        """Get the first slot of the bucket a key hashes to."""
+        mixed = ((key * _HASH_MULTIPLIER) & _HASH_MASK) >> 32
+        return (mixed % self.num_buckets) * self.bucket_size
+
+    def probe(self, key: int) -> Optional[Entry]:
+        """Look up a position, returning (depth, score, bound, move) or None."""
+        start = self._bucket_start(key)
+        keys = self.keys
+        occupied = False
+        for slot in range(start, start + self.bucket_size):
+            stored = keys[slot]
+            if stored == key:
+                self.hits += 1
+                return self.depths[slot], self.scores[slot], self.bounds[slot], self.moves[slot]
+            if stored is not None:
+                occupied = True
+        self.misses += 1
+        if occupied:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, bound: int, move: int) -> None:
+        """Store a search result, evicting according to the replacement policy."""
+        start = self._bucket_start(key)
+        keys, depths = self.keys, self.depths
+        victim = -1
+        for slot in range(start, start + self.bucket_size):
+            stored = keys[slot]
+            if stored == key or stored is None:
+                victim = slot
+                break
+            if victim == -1 or depths[slot] < depths[victim]:
+                victim = slot
+
+        stored = keys[victim]
+        if stored is not None and stored != key:
+            if self.replacement == 'depth' and depth < depths[victim]:
+                self.rejected += 1
+                return
+            self.overwrites += 1
+
+        keys[victim] = key
+        depths[victim] = depth
+        self.scores[victim] = score
+        self.bounds[victim] = bound
+        self.moves[victim] = move
+        self.stores += 1
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.keys if key is not None)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get usage counters for sizing the table."""
+        probes = self.hits + self.misses
+        return {
+            'capacity': self.capacity,
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+            'rejected': self.rejected,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Winning Line Index
+Every four-cell line of a board geometry, built once and shared by the win
+checks and the evaluators so none of them needs bounds checks.
+"""
+
+from functools import lru_cache
+from typing import List, Tuple
+
+Cell = Tuple[int, int]  # (row, col) with row 0 at the top
+
+# Line directions as (row step, col step): horizontal, vertical, both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class WinningLines:
+    """Precomputed four-cell lines of a rows x cols board, indexed by cell."""
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.stride = rows + 1
+
+        self.lines: List[Tuple[Cell, ...]] = []
+        self.masks: List[int] = []
+        self.lines_from: List[List[List[int]]] = [[[] for _ in range(cols)] for _ in range(rows)]
+        self.cell_lines: List[List[List[int]]] = [[[] for _ in range(cols)] for _ in range(rows)]
+
+        for row in range(rows):
+            for col in range(cols):
+                for dr, dc in DIRECTIONS:
+                    end_row, end_col = row + 3 * dr, col + 3 * dc
+                    if not (0 <= end_row < rows and 0 <= end_col < cols):
+                        continue
+                    cells = tuple((row + i * dr, col + i * dc) for i in range(4))
+                    index = len(self.lines)
+                    self.lines.append(cells)
+                    self.masks.append(sum(1 << self.cell_bit(r, c) for r, c in cells))
+                    self.lines_from[row][col].append(index)
+                    for r, c in cells:
+                        self.cell_lines[r][c].append(index)
+
+        # Same index keyed by bitboard bit, for the bitboard hot paths
+        self.bit_lines: List[List[int]] = [[] for _ in range(cols * self.stride)]
+        self.bit_masks: List[List[int]] = [[] for _ in range(cols * self.stride)]
+        for row in range(rows):
+            for col in range(cols):
+                bit = self.cell_bit(row, col)
+                self.bit_lines[bit] = self.cell_lines[row][col]
+                self.bit_masks[bit] = [self.masks[index] for index in self.cell_lines[row][col]]
+
+    def cell_bit(self, row: int, col: int) -> int:
+        """Get the bitboard bit index of a (row, col) cell."""
+        return col * self.stride + (self.rows - 1 - row)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+
+@lru_cache(maxsize=None)
+def get_winning_lines(rows: int = 6, cols: int = 7) -> WinningLines:
+    """Get the shared line index of a board geometry."""
+    return WinningLines(rows, cols)